@@ -1,5 +1,6 @@
 import random
 import copy 
+import itertools
 from models import *
 
 class Board:
@@ -57,6 +58,13 @@ class Board:
 
     def get_num_cols(self):
         return self.num_cols
+
+    def get_height(self):
+        """ 
+        Returns a number of rows above which every row is empty. Board does
+        not keep track of it, so this is num_rows
+        """
+        return self.num_rows
     
     def update_grid(self, new_grid):
         """ 
@@ -65,6 +73,76 @@ class Board:
         assert len(new_grid) == len(self.grid), 'unequal grid lengths'
         self.grid = new_grid
     
+    def get_cell(self, x, y):
+        """ 
+        Get the item at (x, y) without any checks; (x, y) must be on the board
+        """
+        return self.grid[y * self.num_cols + x]
+
+    def set_cell(self, x, y, item):
+        """ 
+        Set the item at (x, y) in place without any checks
+        """
+        self.grid[y * self.num_cols + x] = item
+
+    def row_items(self, y):
+        """ 
+        Returns the items of row y as a list
+        """
+        return self.grid[y * self.num_cols:(y + 1) * self.num_cols]
+
+    def snapshot(self):
+        """ 
+        Returns an immutable copy of the cells that can be given to restore
+        >>> board = Board(2, 1, grid=[1, 2])
+        >>> snap = board.snapshot()
+        >>> board.grid[0] = 9
+        >>> board.restore(snap)
+        >>> board.grid
+        [1, 2]
+        """
+        return tuple(self.grid)
+
+    def restore(self, snapshot):
+        """ 
+        Overwrite the cells with a snapshot taken from a board of the same size
+        """
+        assert len(snapshot) == self.num_cols * self.num_rows, 'unequal grid lengths'
+        self.grid = list(snapshot)
+
+    def fork(self):
+        """ 
+        Returns a CowBoard child with the same items as this board
+        """
+        return CowBoard(self)
+
+    def pop_row(self, y):
+        """ 
+        Remove row y, shift the rows above it down, and add an empty row on top
+        """
+        start_index = y * self.num_cols
+        before = self.grid[0:start_index]
+        after = self.grid[start_index + self.num_cols:]
+        new_zero = [0 for _ in range(self.num_cols)]
+        new_grid = before + after + new_zero
+        self.update_grid(new_grid)
+
+    def push_row(self, row):
+        """ 
+        Insert row at the bottom, shift every row up, and drop the top row
+        """
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        self.update_grid(list(row) + self.grid[:-self.num_cols])
+
+    def insert_row(self, y, row):
+        """ 
+        Insert row at row y, shift the rows from y up, and drop the top row;
+        the inverse of pop_row when the top row is empty
+        """
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        start_index = y * self.num_cols
+        self.update_grid(self.grid[:start_index] + list(row) + self.grid[start_index:-self.num_cols])
+
     def __eq__(self, other):
         """
         Checks whether or not two boards are equal. 
@@ -73,7 +151,7 @@ class Board:
         >>> board_1 == board_2
         True
         """
-        assert type(self) == type(other), 'Must compare two Board objects'
+        assert isinstance(other, Board), 'Must compare two Board objects'
         return self.num_cols == other.num_cols and self.num_rows == other.num_rows and self.grid == other.grid
 
     def __repr__(self):
@@ -90,24 +168,456 @@ class Board:
         4 5
         ===
         """
-        s = '=' * (self.num_cols * 2 - 1) + '\n'
-        for i, val in enumerate(self.grid):
-            s += str(val)
-            if (i + 1) % self.num_cols != 0:
-                s += ' '
-            if (i + 1) % self.num_cols == 0:
-                s += '\n'
-        s += '=' * (self.num_cols * 2 - 1)
-        return s
+        border = '=' * (self.num_cols * 2 - 1)
+        items = list(map(str, self.grid))
+        cols = self.num_cols
+        lines = [' '.join(items[y * cols:(y + 1) * cols]) for y in range(self.num_rows)]
+        return '\n'.join([border] + lines + [border])
+
+
+
+class CowBoard(Board):
+    """ 
+    A Board that stores its items row by row and shares unchanged rows with
+    the board it was forked from. A row is only copied the first time it is
+    written, so forking and snapshotting cost O(num_rows) and each write
+    afterwards costs at most one row copy. Tree searches should fork a
+    CowBoard rather than deepcopy a Board.
+
+    >>> root = CowBoard(Board(2, 2, grid=[1, 0, 2, 4]))
+    >>> child = root.fork()
+    >>> child.set_cell(1, 0, 7)
+    >>> child.grid
+    [1, 7, 2, 4]
+    >>> root.grid
+    [1, 0, 2, 4]
+    >>> child.rows[1] is root.rows[1]
+    True
+    """
+
+    def __init__(self, parent):
+        self.num_cols = parent.num_cols
+        self.num_rows = parent.num_rows
+        if isinstance(parent, CowBoard):
+            self.rows = parent.rows[:]
+            parent._owned = [False] * parent.num_rows
+        else:
+            grid = list(parent.grid)
+            self.rows = [grid[y * self.num_cols:(y + 1) * self.num_cols] for y in range(self.num_rows)]
+        self._owned = [False] * self.num_rows
+
+    @property
+    def grid(self):
+        return _GridView(self)
+
+    @grid.setter
+    def grid(self, new_grid):
+        new_grid = list(new_grid)
+        self.rows = [new_grid[y * self.num_cols:(y + 1) * self.num_cols] for y in range(self.num_rows)]
+        self._owned = [True] * self.num_rows
+
+    def get_cell(self, x, y):
+        return self.rows[y][x]
+
+    def row_items(self, y):
+        return self.rows[y][:]
+
+    def set_cell(self, x, y, item):
+        """ 
+        Set the item at (x, y) in place, copying row y first if it is shared
+        """
+        if not self._owned[y]:
+            self.rows[y] = self.rows[y][:]
+            self._owned[y] = True
+        self.rows[y][x] = item
+
+    def snapshot(self):
+        self._owned = [False] * self.num_rows
+        return tuple(self.rows)
+
+    def restore(self, snapshot):
+        assert len(snapshot) == self.num_rows, 'unequal number of rows'
+        self.rows = list(snapshot)
+        self._owned = [False] * self.num_rows
+
+    def pop_row(self, y):
+        del self.rows[y]
+        del self._owned[y]
+        self.rows.append([0] * self.num_cols)
+        self._owned.append(True)
+
+    def push_row(self, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        self.rows.pop()
+        self._owned.pop()
+        self.rows.insert(0, list(row))
+        self._owned.insert(0, True)
+
+    def insert_row(self, y, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        self.rows.pop()
+        self._owned.pop()
+        self.rows.insert(y, list(row))
+        self._owned.insert(y, True)
+
+    def __repr__(self):
+        return f'<CowBoard num_cols: {self.num_cols} num_rows: {self.num_rows}>'
+
+
+class PaddedBoard(Board):
+    """ 
+    A Board stored with a border of solid WALL cells: PAD columns on each
+    side and PAD rows below the floor, plus TOP empty rows above the board.
+    Any (x, y) up to PAD cells outside the board can be read with get_cell
+    without a bounds check or an exception: walls and floor read as WALL
+    (truthy, i.e. filled), the space above the board reads as 0.
+
+    >>> board = PaddedBoard(2, 2, grid=[1, 0, 2, 4])
+    >>> board.get_cell(1, 1), board.get_cell(-1, 0), board.get_cell(0, -2), board.get_cell(1, 3)
+    (4, -1, -1, 0)
+    >>> board.grid
+    [1, 0, 2, 4]
+    >>> board == Board(2, 2, grid=[1, 0, 2, 4])
+    True
+    """
+
+    PAD = 3
+    TOP = 4
+    WALL = -1
+
+    def __init__(self, num_cols=10, num_rows=22, cell_item=0, grid=None):
+        assert type(num_cols) == int and type(num_rows) == int
+        assert num_cols >= 0 and num_rows >= 0
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        # cells of one padded row, and of the first cell of row 0
+        self.width = num_cols + 2 * self.PAD
+        self.origin = self.PAD * self.width + self.PAD
+        if grid:
+            assert num_cols * num_rows == len(grid)
+        else:
+            grid = [cell_item] * (num_cols * num_rows)
+        self.grid = grid
+
+    @property
+    def grid(self):
+        return _GridView(self)
+
+    @grid.setter
+    def grid(self, new_grid):
+        new_grid = list(new_grid)
+        cols = self.num_cols
+        self.cells = [self.WALL] * (self.width * self.PAD)
+        for y in range(self.num_rows):
+            self.cells += self._padded_row(new_grid[y * cols:(y + 1) * cols])
+        for _ in range(self.TOP):
+            self.cells += self._padded_row([0] * cols)
+
+    def _padded_row(self, row):
+        return [self.WALL] * self.PAD + list(row) + [self.WALL] * self.PAD
+
+    def index(self, x, y):
+        """ 
+        Returns the position of (x, y) in self.cells
+        """
+        return self.origin + y * self.width + x
+
+    def get_cell(self, x, y):
+        return self.cells[self.origin + y * self.width + x]
+
+    def set_cell(self, x, y, item):
+        self.cells[self.origin + y * self.width + x] = item
+
+    def row_items(self, y):
+        start = self.origin + y * self.width
+        return self.cells[start:start + self.num_cols]
+
+    def snapshot(self):
+        return tuple(self.cells)
+
+    def restore(self, snapshot):
+        assert len(snapshot) == len(self.cells), 'unequal grid lengths'
+        self.cells = list(snapshot)
+
+    def pop_row(self, y):
+        start = self.origin - self.PAD + y * self.width
+        del self.cells[start:start + self.width]
+        top = self.origin - self.PAD + (self.num_rows - 1) * self.width
+        self.cells[top:top] = self._padded_row([0] * self.num_cols)
+
+    def push_row(self, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        top = self.origin - self.PAD + (self.num_rows - 1) * self.width
+        del self.cells[top:top + self.width]
+        bottom = self.origin - self.PAD
+        self.cells[bottom:bottom] = self._padded_row(row)
+
+    def insert_row(self, y, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        top = self.origin - self.PAD + (self.num_rows - 1) * self.width
+        del self.cells[top:top + self.width]
+        start = self.origin - self.PAD + y * self.width
+        self.cells[start:start] = self._padded_row(row)
+
+    def __repr__(self):
+        return f'<PaddedBoard num_cols: {self.num_cols} num_rows: {self.num_rows}>'
+
+
+class RingBoard(Board):
+    """ 
+    A Board whose rows live in fixed slots of one flat list, recycled like a
+    circular buffer, and found through a row-index table (a list of slot
+    offsets, row 0 first). Clearing or inserting a row rewrites the cols
+    items of one slot, and moves the offsets of the rows above it by one
+    place in the table: O(cols) item writes plus O(rows) offsets moved,
+    where rebuilding the grid writes O(rows * cols) items.
+
+    >>> board = RingBoard(2, 3, grid=[1, 2, 3, 4, 5, 6])
+    >>> board.pop_row(0)
+    >>> board.grid
+    [3, 4, 5, 6, 0, 0]
+    >>> board.push_row([7, 0])
+    >>> board.get_cell(0, 0), board.row_items(2)
+    (7, [5, 6])
+    """
+
+    def __init__(self, num_cols=10, num_rows=22, cell_item=0, grid=None):
+        assert type(num_cols) == int and type(num_rows) == int
+        assert num_cols >= 0 and num_rows >= 0
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        if grid:
+            assert num_cols * num_rows == len(grid)
+        else:
+            grid = [cell_item] * (num_cols * num_rows)
+        self.grid = grid
+
+    @property
+    def grid(self):
+        return _GridView(self)
+
+    @grid.setter
+    def grid(self, new_grid):
+        self.cells = list(new_grid)
+        self.slots = list(range(0, len(self.cells), self.num_cols))
+
+    def get_cell(self, x, y):
+        return self.cells[self.slots[y] + x]
+
+    def set_cell(self, x, y, item):
+        self.cells[self.slots[y] + x] = item
+
+    def row_items(self, y):
+        start = self.slots[y]
+        return self.cells[start:start + self.num_cols]
+
+    def snapshot(self):
+        return tuple(self.cells), tuple(self.slots)
+
+    def restore(self, snapshot):
+        cells, slots = snapshot
+        assert len(cells) == len(self.cells), 'unequal grid lengths'
+        self.cells = list(cells)
+        self.slots = list(slots)
+
+    def pop_row(self, y):
+        cols = self.num_cols
+        start = self.slots[y]
+        del self.slots[y]
+        self.cells[start:start + cols] = [0] * cols
+        self.slots.append(start)
+
+    def push_row(self, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        start = self.slots.pop()
+        self.cells[start:start + self.num_cols] = row
+        self.slots.insert(0, start)
+
+    def insert_row(self, y, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        start = self.slots.pop()
+        self.cells[start:start + self.num_cols] = row
+        self.slots.insert(y, start)
+
+    def __repr__(self):
+        return f'<RingBoard num_cols: {self.num_cols} num_rows: {self.num_rows}>'
+
+
+class SparseBoard(Board):
+    """ 
+    A Board that stores only the rows up to the highest occupied one, for
+    tall boards that are mostly empty. Every row above get_height() is
+    empty and takes no memory, so scans can stop there.
+
+    >>> board = SparseBoard(3, 500)
+    >>> board.set_cell(1, 2, 5)
+    >>> board.get_height(), board.get_cell(1, 2), board.get_cell(1, 400)
+    (3, 5, 0)
+    >>> board.pop_row(0)
+    >>> board.get_height(), board.row_items(1)
+    (2, [0, 5, 0])
+    >>> board.set_cell(1, 1, 0)
+    >>> board.get_height()
+    0
+    """
+
+    def __init__(self, num_cols=10, num_rows=22, cell_item=0, grid=None):
+        assert type(num_cols) == int and type(num_rows) == int
+        assert num_cols >= 0 and num_rows >= 0
+        assert not cell_item, 'the rows of a SparseBoard start empty'
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.stack = []
+        if grid:
+            assert num_cols * num_rows == len(grid)
+            self.grid = grid
+
+    @property
+    def grid(self):
+        return _GridView(self)
+
+    @grid.setter
+    def grid(self, new_grid):
+        cols = self.num_cols
+        self.stack = [list(new_grid[y * cols:(y + 1) * cols]) for y in range(len(new_grid) // cols)] \
+            if cols else []
+        self._trim()
+
+    def _trim(self):
+        stack = self.stack
+        while stack and not any(stack[-1]):
+            stack.pop()
+
+    def get_height(self):
+        return len(self.stack)
+
+    def get_cell(self, x, y):
+        if y < len(self.stack):
+            return self.stack[y][x]
+        return 0
+
+    def set_cell(self, x, y, item):
+        stack = self.stack
+        if y < len(stack):
+            stack[y][x] = item
+            if not item and y == len(stack) - 1:
+                self._trim()
+        elif item:
+            cols = self.num_cols
+            stack.extend([0] * cols for _ in range(y + 1 - len(stack)))
+            stack[y][x] = item
+
+    def row_items(self, y):
+        if y < len(self.stack):
+            return self.stack[y][:]
+        return [0] * self.num_cols
+
+    def snapshot(self):
+        return tuple(tuple(row) for row in self.stack)
+
+    def restore(self, snapshot):
+        self.stack = [list(row) for row in snapshot]
+
+    def pop_row(self, y):
+        if y < len(self.stack):
+            del self.stack[y]
+            self._trim()
+
+    def push_row(self, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        stack = self.stack
+        if stack or any(row):
+            stack.insert(0, list(row))
+            if len(stack) > self.num_rows:
+                stack.pop()
+            self._trim()
+
+    def insert_row(self, y, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        stack = self.stack
+        if y < len(stack):
+            stack.insert(y, list(row))
+            if len(stack) > self.num_rows:
+                stack.pop()
+            self._trim()
+        elif any(row):
+            stack.extend([0] * self.num_cols for _ in range(y - len(stack)))
+            stack.append(list(row))
+
+    def __repr__(self):
+        return f'<SparseBoard num_cols: {self.num_cols} num_rows: {self.num_rows}>'
+
+
+class _GridView:
+    """ 
+    The flat grid of a Board that stores its items some other way, so code
+    written against Board.grid keeps working
+    """
+
+    def __init__(self, board):
+        self._board = board
+
+    def __len__(self):
+        return self._board.num_cols * self._board.num_rows
+
+    def __iter__(self):
+        board = self._board
+        height = board.get_height()
+        for y in range(height):
+            yield from board.row_items(y)
+        yield from itertools.repeat(0, (board.num_rows - height) * board.num_cols)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        y, x = divmod(range(len(self))[i], self._board.num_cols)
+        return self._board.get_cell(x, y)
+
+    def __setitem__(self, i, item):
+        y, x = divmod(range(len(self))[i], self._board.num_cols)
+        self._board.set_cell(x, y, item)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
 
 
 def pop_row(board,y):
-    start_index = y * board.num_cols
-    before = board.grid[0:start_index]
-    after = board.grid[start_index + board.num_cols:]
-    new_zero = [0 for _ in range(board.num_cols)]
-    new_grid = before + after + new_zero
-    board.update_grid(new_grid)
+    board.pop_row(y)
+
+def insert_row(board, y, row):
+    """ 
+    Insert row at row y of board, dropping its top row
+    >>> board = Board(2, 2, grid=[1, 2, 3, 4])
+    >>> insert_row(board, 1, [9, 0])
+    >>> board.grid
+    [1, 2, 9, 0]
+    """
+    board.insert_row(y, row)
+
+def push_row(board, row):
+    """ 
+    Insert row at the bottom of board, dropping its top row
+    >>> board = Board(2, 2, grid=[1, 2, 3, 4])
+    >>> push_row(board, [9, 0])
+    >>> board.grid
+    [9, 0, 1, 2]
+    """
+    board.push_row(row)
+
+def line_clear_score(num_lines):
+    """ 
+    Returns the points for clearing num_lines rows with a single pytromino
+    >>> [line_clear_score(n) for n in range(5)]
+    [0, 100, 300, 500, 800]
+    """
+    if 0 < num_lines < 4:
+        return (num_lines * 2 - 1) * 100
+    elif num_lines >= 4:
+        return 800
+    return 0
 
 # ---------------------------------------------------------------------------- #
 # --------------------------------- Required --------------------------------- #
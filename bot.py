@@ -0,0 +1,262 @@
+import time
+from collections import namedtuple
+from models import *
+from board import *
+from features import FEATURE_NAMES, row_masks, column_heights, mask_features
+from placements import FOOTPRINTS, drop_row, lock
+from surfacedb import placement_fits
+
+# ---------------------------------------------------------------------------- #
+# --------------------------- Beam Search Autoplayer ------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# The bot plans every known pytromino (the current one, the next one and the
+# held one) with a beam search over hard-drop placements. Boards are packed
+# rows (see features.py), so cloning a board is copying a list of ints and
+# evaluating it is one mask_features call.
+#
+# A move is whether to hold first, a rotation index (see shapes.ORIENTATIONS)
+# and the x of the reference block; the pytromino is then rotated at the
+# spawn position, shifted to x and hard-dropped.
+#
+# With a surfacedb.SurfaceDB, the placement stored for the surface and the
+# current type is played when there is one, and the search is skipped.
+
+Move = namedtuple('Move', ['hold', 'rotation', 'x', 'value'])
+
+# weight of each feature of features.FEATURE_NAMES
+DEFAULT_WEIGHTS = {
+    'aggregate_height': -0.51,
+    'max_height': -0.1,
+    'holes': -3.5,
+    'bumpiness': -0.18,
+    'row_transitions': -0.3,
+    'column_transitions': -0.9,
+    'wells': -0.3,
+}
+
+# weight of a point of line_clear_score
+SCORE_WEIGHT = 0.01
+
+# rotation index -> Game.apply actions reaching it from the spawn rotation
+ROTATION_ACTIONS = ((), ('cw',), ('cw', 'cw'), ('ccw',))
+
+# a search state: packed rows, held type, index of the next unplaced type in
+# the queue, points so far, first move, value
+_State = namedtuple('_State', ['masks', 'held', 'pos', 'points', 'first', 'value'])
+
+
+class Bot:
+    """
+    Plays with a beam search over placements of the current, next and held
+    pytrominos.
+
+    >>> from engine import Game
+    >>> game = Game(seed=3)
+    >>> bot = Bot(beam_width=4, time_budget=0.5)
+    >>> bot.run(game, max_pieces=30) >= 0 and not game.gameover
+    True
+    >>> game.pieces
+    30
+    """
+
+    def __init__(self, beam_width=8, time_budget=0.02, weights=None, clock=time.perf_counter, db=None):
+        """
+        Parameters
+        ----------
+        beam_width:
+            type: int
+            brief: (optional) search states kept after placing each pytromino
+        time_budget:
+            type: float
+            brief: (optional) seconds allowed per move. The search stops
+            expanding at the deadline and returns the best move found so far
+        weights:
+            type: dict
+            brief: (optional) weight per name of features.FEATURE_NAMES,
+            missing names default to DEFAULT_WEIGHTS
+        clock:
+            type: Function, () -> float
+            brief: (optional) returns the current time in seconds
+        db:
+            type: surfacedb.SurfaceDB
+            brief: (optional) placements to play without searching
+        """
+        self.beam_width = beam_width
+        self.time_budget = time_budget
+        self.clock = clock
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.weights = tuple(weights[name] for name in FEATURE_NAMES)
+        self.timeouts = 0
+        self.db = db
+        self.db_hits = 0
+
+    def evaluate(self, masks, num_cols):
+        """
+        Returns the weighted sum of the features of packed rows.
+        """
+        return sum(w * f for w, f in zip(self.weights, mask_features(masks, num_cols)))
+
+    def _children(self, state, pytromino_type, held, pos, num_cols, limit, hold, deadline):
+        """
+        Returns a state per legal placement of pytromino_type, which must
+        stay below the hidden rows at limit. Stops early at the deadline.
+        """
+        masks = state.masks
+        heights = column_heights(masks, num_cols)
+        children = []
+        for footprint in FOOTPRINTS[pytromino_type]:
+            if children and self.clock() > deadline:
+                break
+            for x in range(-footprint.min_dx, num_cols - footprint.max_dx):
+                y = drop_row(footprint, x, heights)
+                if y + footprint.max_dy >= limit:
+                    continue
+                new_masks, lines = lock(masks, footprint, x, y, num_cols)
+                points = state.points + line_clear_score(lines)
+                first = state.first or Move(hold, footprint.rotation, x, 0)
+                value = points * SCORE_WEIGHT + self.evaluate(new_masks, num_cols)
+                children.append(_State(new_masks, held, pos, points, first, value))
+        return children
+
+    def search(self, masks, num_cols, num_rows, queue, held=None, can_hold=True):
+        """
+        Returns the best Move for the first pytromino of queue.
+
+        Parameters
+        ----------
+        masks:
+            type: list[int]
+            brief: the packed rows of the board, bottom row first
+        num_cols, num_rows:
+            type: int
+            brief: size of the board, the top 2 rows are hidden
+        queue:
+            type: list[Pytromino.Types]
+            brief: the current pytromino type followed by the known next types
+        held:
+            type: Pytromino.Types
+            brief: (optional) the type in the holder, None if it is empty
+        can_hold:
+            type: bool
+            brief: (optional) whether the current pytromino may be swapped
+        Returns
+        -------
+            type: Move or None
+            brief: None if no placement keeps the pytromino below the hidden rows
+        """
+        db = self.db
+        if db is not None and db.num_cols == num_cols:
+            heights = column_heights(masks, num_cols)
+            placement = db.lookup(heights, queue[0])
+            if placement is not None and placement_fits(heights, num_rows, queue[0], *placement):
+                self.db_hits += 1
+                return Move(False, placement[0], placement[1], 0)
+        deadline = self.clock() + self.time_budget
+        limit = num_rows - 2
+        beam = [_State(masks, held, 0, 0, None, 0)]
+        best = None
+        depth = 0
+        while beam:
+            level = {}
+            for state in beam:
+                if self.clock() > deadline and (best or level):
+                    # out of time: fall back on the best of the last full
+                    # level, or of this one if none is complete yet
+                    self.timeouts += 1
+                    return (best or max(level.values(), key=lambda s: s.value)).first
+                pos = state.pos
+                if pos >= len(queue):
+                    continue
+                options = [(queue[pos], state.held, pos + 1, False)]
+                if depth or can_hold:
+                    if state.held is not None:
+                        options.append((state.held, queue[pos], pos + 1, True))
+                    elif pos + 1 < len(queue):
+                        options.append((queue[pos + 1], queue[pos], pos + 2, True))
+                for pytromino_type, new_held, new_pos, hold in options:
+                    if pytromino_type == queue[pos] and hold:
+                        # swapping for the same type changes nothing
+                        continue
+                    for child in self._children(state, pytromino_type, new_held, new_pos,
+                                                num_cols, limit, hold and not depth, deadline):
+                        key = (tuple(child.masks), child.held, child.pos)
+                        other = level.get(key)
+                        if other is None or child.value > other.value:
+                            level[key] = child
+            if not level:
+                break
+            beam = sorted(level.values(), key=lambda s: s.value, reverse=True)[:self.beam_width]
+            best = beam[0]
+            depth += 1
+        return best.first if best else None
+
+    def choose(self, game):
+        """
+        Returns the best Move for the current pytromino of an engine.Game.
+        """
+        held = game.holder.get_item()
+        return self.search(row_masks(game.board), game.num_cols, game.num_rows,
+                           [game.pytro_type, game.next_type],
+                           held.get_type() if held else None, not game.held)
+
+    def play(self, game, apply=None, move=None):
+        """
+        Choose and perform one move on an engine.Game, as actions of
+        Game.apply. Returns the number of rows cleared.
+
+        Parameters
+        ----------
+        game:
+            type: engine.Game
+            brief: the game to play
+        apply:
+            type: Function, str -> bool
+            brief: (optional) performs an action on game, e.g.
+            replay.ReplayWriter.apply to record it. Defaults to game.apply
+        move:
+            type: Move
+            brief: (optional) the move to perform, by default self.choose(game)
+        """
+        if apply is None:
+            apply = game.apply
+        if move is None:
+            move = self.choose(game)
+        if move is not None:
+            if move.hold:
+                apply('hold')
+            for action in ROTATION_ACTIONS[move.rotation]:
+                apply(action)
+            action = 'right' if move.x > game.x else 'left'
+            while game.x != move.x and apply(action):
+                pass
+        lines = game.lines
+        apply('drop')
+        return game.lines - lines
+
+    def run(self, game, max_pieces=None, apply=None):
+        """
+        Play until the game is over or max_pieces pytrominos are locked.
+        Returns the score.
+        """
+        while not game.gameover and (max_pieces is None or game.pieces < max_pieces):
+            self.play(game, apply)
+        return game.score
+
+
+def _main(num_games=5, beam_width=8, time_budget=0.02, max_pieces=1000):
+    from engine import Game
+    bot = Bot(beam_width, time_budget)
+    start = time.perf_counter()
+    pieces = 0
+    for seed in range(num_games):
+        game = Game(seed=seed)
+        score = bot.run(game, max_pieces)
+        pieces += game.pieces
+        print(f'game {seed}: score {score}, lines {game.lines}, pieces {game.pieces}')
+    elapsed = time.perf_counter() - start
+    print(f'{pieces / elapsed:.1f} pieces per second, {bot.timeouts} moves cut by the time budget')
+
+if __name__ == '__main__':
+    import sys
+    _main(*(int(arg) if i != 2 else float(arg) for i, arg in enumerate(sys.argv[1:])))
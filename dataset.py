@@ -0,0 +1,232 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+from models import *
+from board import *
+from shapes import orientation_of
+
+# ---------------------------------------------------------------------------- #
+# ------------------------ Fixed-Record Board Dataset ------------------------ #
+# ---------------------------------------------------------------------------- #
+
+# File layout (little endian):
+#   header: magic, version, num_cols, num_rows, record size
+#   records: num_cols * num_rows cell bytes (same order as Board.grid),
+#            followed by piece, rotation, held (1 byte each) and score (4 bytes)
+# Pieces are stored as Pytromino.Types values, 0 meaning "no piece".
+
+MAGIC = b'PYTD'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHI')
+FIELDS = struct.Struct('<BBBI')
+
+# offsets of the one-byte fields, relative to the end of the cells
+COLUMNS = {'piece': 0, 'rotation': 1, 'held': 2}
+
+Sample = namedtuple('Sample', ['cells', 'piece', 'rotation', 'held', 'score'])
+
+def record_size(num_cols, num_rows):
+    return num_cols * num_rows + FIELDS.size
+
+def _type_value(pytromino):
+    return pytromino.get_type().value if pytromino else 0
+
+def encode_record(board, pytromino=None, holder=None, score=0):
+    """
+    Pack one game state into the bytes of a single record.
+
+    Parameters
+    ----------
+    board:
+        type: Board object
+        brief: the board whose cells (ints from 0 to 255) are stored
+    pytromino:
+        type: Pytromino object
+        brief: (optional) the current pytromino
+    holder:
+        type: Holder object
+        brief: (optional) the holder, only its item is stored
+    score:
+        type: int
+        brief: (optional) the score at this state
+    Returns
+    -------
+        type: bytes
+        brief: the encoded record
+
+    >>> board = Board(2, 2, grid=[0, 1, 2, 0])
+    >>> encode_record(board, pytromino_factory(Pytromino.Types.T), score=300)
+    b'\\x00\\x01\\x02\\x00\\x05\\x00\\x00,\\x01\\x00\\x00'
+    """
+    held = holder.get_item() if holder else None
+    rotation = orientation_of(pytromino) if pytromino else 0
+    return bytes(board.grid) + FIELDS.pack(_type_value(pytromino), rotation, _type_value(held), score)
+
+
+class DatasetWriter:
+    """
+    Appends game states to a dataset file. Records are buffered and written
+    in bulk; call flush() or close() (or use a with statement) to make sure
+    everything reaches the file.
+    """
+
+    def __init__(self, path, num_cols=10, num_rows=22, buffer_records=4096):
+        """
+        Open path for appending, writing the header if the file is new.
+
+        Parameters
+        ----------
+        path:
+            type: str
+            brief: the dataset file
+        num_cols, num_rows:
+            type: int
+            brief: size of the boards stored in this file. An existing file
+            must have been created with the same size.
+        buffer_records:
+            type: int
+            brief: (optional) number of records kept in memory before a write
+        """
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.record_size = record_size(num_cols, num_rows)
+        self.buffer_records = buffer_records
+        self._pending = []
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, 'rb') as f:
+                header = _read_header(f.read(HEADER.size))
+            assert header[1:] == (num_cols, num_rows, self.record_size), 'board size does not match the dataset'
+        self._file = open(path, 'ab')
+        if not exists:
+            self._file.write(HEADER.pack(MAGIC, VERSION, num_cols, num_rows, self.record_size))
+
+    def append(self, board, pytromino=None, holder=None, score=0):
+        """
+        Add one game state, see encode_record for the parameters.
+        """
+        assert board.num_cols == self.num_cols and board.num_rows == self.num_rows, 'unequal board sizes'
+        self._pending.append(encode_record(board, pytromino, holder, score))
+        if len(self._pending) >= self.buffer_records:
+            self.flush()
+
+    def extend(self, samples):
+        """
+        Add many game states at once.
+
+        Parameters
+        ----------
+        samples:
+            type: iterable of tuple(Board, Pytromino, Holder, int)
+            brief: the arguments of append for each game state
+        """
+        for sample in samples:
+            self.append(*sample)
+
+    def append_raw(self, records):
+        """
+        Add records that are already encoded, e.g. produced by encode_record
+        in worker processes. len(records) must be a multiple of record_size.
+        """
+        assert len(records) % self.record_size == 0, 'partial record'
+        self.flush()
+        self._file.write(records)
+
+    def flush(self):
+        if self._pending:
+            self._file.write(b''.join(self._pending))
+            self._pending = []
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DatasetReader:
+    """
+    Random access to the records of a dataset file through mmap. Nothing is
+    copied: cells and columns are memoryviews into the mapped file, which can
+    be handed to numpy.frombuffer (or anything else that speaks the buffer
+    protocol) as they are. Only records present when the reader was opened
+    are visible.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, self.num_cols, self.num_rows, self.record_size = _read_header(self._mmap[:HEADER.size])
+        self.num_cells = self.num_cols * self.num_rows
+        count = (len(self._mmap) - HEADER.size) // self.record_size
+        self.buffer = memoryview(self._mmap)[HEADER.size:HEADER.size + count * self.record_size]
+
+    def __len__(self):
+        return len(self.buffer) // self.record_size
+
+    def _offset(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f'record index out of range: {i}')
+        return i * self.record_size
+
+    def cells(self, i):
+        """
+        Returns the cells of record i as a memoryview, in Board.grid order.
+        """
+        offset = self._offset(i)
+        return self.buffer[offset:offset + self.num_cells]
+
+    def __getitem__(self, i):
+        offset = self._offset(i)
+        fields = FIELDS.unpack_from(self.buffer, offset + self.num_cells)
+        return Sample(self.buffer[offset:offset + self.num_cells], *fields)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def column(self, name):
+        """
+        Returns a strided memoryview over one of the single-byte fields
+        ('piece', 'rotation' or 'held') of every record.
+        """
+        start = self.num_cells + COLUMNS[name]
+        return self.buffer[start::self.record_size]
+
+    def get_board(self, i):
+        """
+        Returns record i as a new Board object.
+        """
+        return Board(self.num_cols, self.num_rows, grid=list(self.cells(i)))
+
+    def close(self):
+        """
+        Unmap the file. Memoryviews handed out by the reader must be dropped
+        (or released) first, otherwise mmap raises BufferError.
+        """
+        self.buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_header(data):
+    assert len(data) == HEADER.size, 'truncated dataset header'
+    magic, version, num_cols, num_rows, size = HEADER.unpack(data)
+    assert magic == MAGIC, 'not a Pyturis dataset'
+    assert version == VERSION, f'unsupported dataset version: {version}'
+    return version, num_cols, num_rows, size
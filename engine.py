@@ -0,0 +1,409 @@
+import random
+from models import *
+from board import *
+from shapes import ORIENTATIONS
+from kicks import KICKS
+from stats import Stats
+from events import EventType
+
+# ---------------------------------------------------------------------------- #
+# --------------------------- Headless Game Engine --------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# The rules of view.py without turtle or globals, so that any number of games
+# can run in one process. The current pytromino is kept as a type, a rotation
+# index into shapes.ORIENTATIONS and the (x, y) of its reference block, which
+# plays the role of pytro_pos in view.py.
+#
+# Games play on a PaddedBoard by default: the walls and floor are stored as
+# solid cells, so a collision check is one lookup per block with no bounds
+# checks. Any other Board (e.g. a SharedBoard) takes the checked path.
+#
+# Rotations try the wall kicks of kicks.KICKS in order. No move or kick takes
+# the top of a pytromino above row num_rows + 1, the highest a vertical I
+# reaches when rotated at the spawn position.
+
+# cell value of garbage rows received in versus mode
+GARBAGE = 8
+
+# garbage rows sent to the opponent for clearing n rows at once
+GARBAGE_TABLE = [0, 0, 1, 2, 4]
+
+def garbage_for(num_lines):
+    return GARBAGE_TABLE[min(num_lines, len(GARBAGE_TABLE) - 1)]
+
+# action -> (dx, dy, clockwise turns)
+ACTIONS = {
+    'left': (-1, 0, 0),
+    'right': (1, 0, 0),
+    'down': (0, -1, 0),
+    'cw': (0, 0, 1),
+    'ccw': (0, 0, 3),
+}
+
+
+class Shape:
+    """
+    One orientation of a pytromino type, compiled for a row stride: its
+    extent, and the offsets of its blocks in the cells of a board relative
+    to the index of the reference block.
+    """
+
+    def __init__(self, rotation, blocks, stride):
+        self.rotation = rotation
+        self.blocks = blocks
+        self.min_dx = min(dx for dx, _ in blocks)
+        self.max_dx = max(dx for dx, _ in blocks)
+        self.min_dy = min(dy for _, dy in blocks)
+        self.max_dy = max(dy for _, dy in blocks)
+        self.offsets = tuple(dy * stride + dx for dx, dy in blocks)
+
+_compiled_shapes = {}
+
+def compile_shapes(stride):
+    """
+    Returns {Pytromino.Types: tuple of 4 Shape}, built once per row stride:
+    num_cols for a Board.grid, width for the cells of a PaddedBoard.
+    """
+    shapes = _compiled_shapes.get(stride)
+    if shapes is None:
+        shapes = {pytromino_type: tuple(Shape(k, blocks, stride) for k, blocks in enumerate(rotations))
+                  for pytromino_type, rotations in ORIENTATIONS.items()}
+        _compiled_shapes[stride] = shapes
+    return shapes
+
+
+class Game:
+    """
+    The state of a single game: board, current and next pytromino, holder
+    and score.
+
+    >>> game = Game(seed=0)
+    >>> lines = game.hard_drop()
+    >>> game.pieces
+    1
+    >>> sum(1 for item in game.board.grid if item)
+    4
+    """
+
+    def __init__(self, num_cols=10, num_rows=22, seed=None, stats=None, events=None, game_id=0, board=None):
+        """
+        Create a new game with an empty board and a random first pytromino.
+
+        Parameters
+        ----------
+        num_cols, num_rows:
+            type: int
+            brief: (optional) size of the board, the top 2 rows are hidden
+        seed:
+            type: any
+            brief: (optional) seed of the pytromino sequence and garbage holes
+        stats:
+            type: Stats object
+            brief: (optional) receives the lock, clear, hold and hard drop
+            events of this game. Defaults to a new Stats.
+        events:
+            type: EventRing object
+            brief: (optional) receives the events of this game, tagged with game_id
+        game_id:
+            type: int
+            brief: (optional) identifies this game in the event stream
+        board:
+            type: Board object
+            brief: (optional) an empty board to play on, e.g. a SharedBoard;
+            num_cols and num_rows are then taken from it. Defaults to a new
+            PaddedBoard.
+        """
+        self.random = random.Random(seed)
+        if board is None:
+            board = PaddedBoard(num_cols, num_rows, cell_item=0)
+        num_cols = board.num_cols
+        num_rows = board.num_rows
+        self.board = board
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.spawn_x = (num_cols - 1) // 2
+        self.spawn_y = num_rows - 1
+        self.ceiling = num_rows + 1
+        self.size = num_cols * num_rows
+        self.padded = isinstance(board, PaddedBoard)
+        self.shapes = compile_shapes(board.width if self.padded else num_cols)
+        self.holder = Holder()
+        self.held = False
+        self.score = 0
+        self.lines = 0
+        self.pieces = 0
+        self.gameover = False
+        self.stats = Stats() if stats is None else stats
+        self.events = events
+        self.id = game_id
+        self.next_type = self._random_type()
+        self.spawn()
+
+    def _random_type(self):
+        return Pytromino.Types(self.random.randint(1, 7))
+
+    def spawn(self, pytromino_type=None):
+        """
+        Put a new pytromino at the spawn position, by default the next one.
+        """
+        if pytromino_type is None:
+            pytromino_type = self.next_type
+            self.next_type = self._random_type()
+        self.pytro_type = pytromino_type
+        self.rotation = 0
+        self.shape = self.shapes[pytromino_type][0]
+        self.blocks = self.shape.blocks
+        self.x = self.spawn_x
+        self.y = self.spawn_y
+
+    def current_pytromino(self):
+        """
+        Returns the current pytromino as a Pytromino object whose blocks are
+        relative to (self.x, self.y), like pytro and pytro_pos in view.py.
+        """
+        pytro = pytromino_factory(self.pytro_type)
+        pytro.blocks_pos = list(self.blocks)
+        return pytro
+
+# ---------------------------------------------------------------------------- #
+# -------------------------------- Collisions -------------------------------- #
+# ---------------------------------------------------------------------------- #
+
+    def fits(self, blocks, x, y):
+        """
+        Check whether blocks placed at (x, y) are inside the walls, above the
+        floor and not on a filled cell. The space above the board is free.
+        """
+        cols = self.num_cols
+        get_cell = self.board.get_cell
+        for dx, dy in blocks:
+            cx = x + dx
+            cy = y + dy
+            if cx < 0 or cx >= cols or cy < 0:
+                return False
+            if cy < self.num_rows and get_cell(cx, cy):
+                return False
+        return True
+
+    def fits_shape(self, shape, x, y):
+        """
+        fits for a compiled Shape. On a PaddedBoard this is one lookup per
+        block: walls and floor are solid cells, and a pytromino that starts
+        on the board never moves, rotates or kicks more than PaddedBoard.PAD
+        cells past it. Otherwise three bound checks come first, and indices past
+        the end of the grid are above the board.
+        """
+        board = self.board
+        if self.padded:
+            cells = board.cells
+            base = board.origin + y * board.width + x
+            for offset in shape.offsets:
+                if cells[base + offset]:
+                    return False
+            return True
+        if x + shape.min_dx < 0 or x + shape.max_dx >= self.num_cols or y + shape.min_dy < 0:
+            return False
+        grid = board.grid
+        size = self.size
+        base = y * self.num_cols + x
+        for offset in shape.offsets:
+            i = base + offset
+            if i < size and grid[i]:
+                return False
+        return True
+
+    def can_drop(self, dist=1):
+        return self.fits_shape(self.shape, self.x, self.y - dist)
+
+    def drop_distance(self):
+        """
+        Returns how many rows the current pytromino can fall, i.e. the distance
+        to its ghost.
+        """
+        dist = 0
+        while self.fits_shape(self.shape, self.x, self.y - dist - 1):
+            dist += 1
+        return dist
+
+# ---------------------------------------------------------------------------- #
+# --------------------------------- Actions ---------------------------------- #
+# ---------------------------------------------------------------------------- #
+
+    def transform(self, dx, dy, turns):
+        """
+        Shift the current pytromino by (dx, dy) and rotate it clockwise turns
+        times, if the result fits. A rotation that does not fit tries the
+        wall kicks of kicks.KICKS. Returns True if it changed.
+        """
+        rotation = (self.rotation + turns) & 3
+        shape = self.shapes[self.pytro_type][rotation]
+        x = self.x + dx
+        y = self.y + dy
+        for kick_x, kick_y in KICKS[self.pytro_type][self.rotation][turns]:
+            new_x = x + kick_x
+            new_y = y + kick_y
+            if new_y + shape.max_dy <= self.ceiling and self.fits_shape(shape, new_x, new_y):
+                self.x = new_x
+                self.y = new_y
+                self.rotation = rotation
+                self.shape = shape
+                self.blocks = shape.blocks
+                return True
+        return False
+
+    def apply(self, action):
+        """
+        Perform an action by name: one of ACTIONS, 'drop', 'hold' or 'tick'.
+        Returns True if the action changed the game.
+        """
+        delta = ACTIONS.get(action)
+        if delta is not None:
+            return self.transform(*delta)
+        if action == 'drop':
+            self.hard_drop()
+            return True
+        if action == 'hold':
+            return self.hold()
+        if action == 'tick':
+            self.tick()
+            return True
+        raise ValueError(f'Unknown action: "{action}"')
+
+    def move(self, dx, dy=0):
+        """
+        Shift the current pytromino if it fits. Returns True if it moved.
+        """
+        return self.transform(dx, dy, 0)
+
+    def rotate(self, turns=1):
+        """
+        Rotate the current pytromino clockwise turns times (3 for a single
+        counterclockwise turn) if it fits, with wall kicks. Returns True if it
+        rotated.
+        """
+        return self.transform(0, 0, turns)
+
+    def soft_drop(self):
+        return self.move(0, -1)
+
+    def hard_drop(self):
+        """
+        Drop the current pytromino to its ghost position and lock it.
+        Returns the number of rows cleared.
+        """
+        dist = self.drop_distance()
+        self.y -= dist
+        self.stats.on_hard_drop(dist)
+        if self.events is not None:
+            self.events.emit(EventType.HARD_DROP, self.id, dist)
+        return self.lock()
+
+    def hold(self):
+        """
+        Swap the current pytromino with the held one, at most once per
+        pytromino. Returns True if the swap happened.
+        """
+        if self.held:
+            return False
+        if self.events is not None:
+            self.events.emit(EventType.HOLD, self.id, self.pytro_type.value)
+        current = pytromino_factory(self.pytro_type)
+        held = self.holder.get_item()
+        self.holder.store(current)
+        if held:
+            self.spawn(held.get_type())
+        else:
+            self.spawn()
+        self.held = True
+        self.stats.on_hold()
+        return True
+
+    def tick(self):
+        """
+        Apply one step of gravity: fall one row, or lock if the pytromino
+        cannot fall. Returns the number of rows cleared.
+        """
+        if self.gameover:
+            return 0
+        if self.can_drop():
+            self.y -= 1
+            self.check_over()
+            return 0
+        return self.lock()
+
+# ---------------------------------------------------------------------------- #
+# ------------------------------- Board Updates ------------------------------ #
+# ---------------------------------------------------------------------------- #
+
+    def lock(self):
+        """
+        Write the current pytromino into the board, clear full rows, update
+        the score and spawn the next pytromino. Returns the number of rows
+        cleared.
+        """
+        board = self.board
+        item = self.pytro_type.value
+        rows = set()
+        for dx, dy in self.blocks:
+            cy = self.y + dy
+            if cy < self.num_rows:
+                board.set_cell(self.x + dx, cy, item)
+                rows.add(cy)
+        full_rows = [y for y in sorted(rows, reverse=True) if all(board.row_items(y))]
+        for y in full_rows:
+            pop_row(board, y)
+        num_lines = len(full_rows)
+        points = line_clear_score(num_lines)
+        self.lines += num_lines
+        self.score += points
+        self.pieces += 1
+        self.stats.on_lock()
+        self.stats.on_clear(num_lines, points)
+        if self.events is not None:
+            self.events.emit(EventType.LOCK, self.id, item, self.pieces)
+            if num_lines:
+                self.events.emit(EventType.CLEAR, self.id, num_lines, points)
+        self.spawn()
+        self.held = False
+        self.check_over()
+        return num_lines
+
+    def add_garbage(self, num_rows, hole=None):
+        """
+        Push num_rows rows of garbage, filled except for one hole column, in
+        at the bottom of the board. The current pytromino is pushed up if it
+        overlaps. Rows pushed out of the top end the game.
+        """
+        if hole is None:
+            hole = self.random.randrange(self.num_cols)
+        board = self.board
+        if any(any(board.row_items(y)) for y in range(self.num_rows - num_rows, self.num_rows)):
+            self.end()
+        row = [GARBAGE] * self.num_cols
+        row[hole] = 0
+        for _ in range(num_rows):
+            push_row(board, row)
+        while not self.fits_shape(self.shape, self.x, self.y):
+            if self.y + self.shape.max_dy >= self.num_rows + 1:
+                # pushed up into the hidden rows with nowhere to go
+                self.end()
+                return
+            self.y += 1
+        self.check_over()
+
+    def check_over(self):
+        """
+        The game is over when the current pytromino reaches into the hidden
+        top 2 rows and cannot fall any further, as in view.check_over.
+        """
+        top = self.shape.max_dy + self.y
+        if top >= self.num_rows - 2 and not self.can_drop():
+            self.end()
+        return self.gameover
+
+    def end(self):
+        if not self.gameover:
+            self.gameover = True
+            if self.events is not None:
+                self.events.emit(EventType.GAME_OVER, self.id, self.score, self.pieces)
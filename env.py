@@ -0,0 +1,149 @@
+import random
+from array import array
+from collections import namedtuple
+from engine import *
+from shared import SharedBoard
+
+# ---------------------------------------------------------------------------- #
+# -------------------------- Vectorized Environment -------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# K engine games stepped together for training agents, gym style. Every
+# observation lives in a buffer allocated once: the boards of the games are
+# memoryviews into the cells buffer (see shared.SharedBoard), so a step
+# writes nothing but the few per-game fields. Each buffer supports the
+# buffer protocol, e.g. numpy.frombuffer(env.cells, numpy.uint8) is a
+# zero-copy (num_envs, num_rows, num_cols) array once reshaped.
+#
+# A step is still a Python loop over the games, each running its action and
+# gravity through the engine, so it reaches about 130k-180k steps per second
+# on one core with random actions, not hundreds of thousands. Most of the
+# time goes to the engine's per-game collision tests and locks; doing them
+# for all games at once would take array operations over the row masks of
+# every board (numpy), which this project does not depend on.
+
+# action index -> engine action, None does nothing
+ACTION_NAMES = (None, 'left', 'right', 'down', 'cw', 'ccw', 'drop', 'hold')
+
+Observation = namedtuple('Observation', ['cells', 'current', 'next', 'held', 'rotation', 'x', 'y', 'score'])
+
+
+class VecEnv:
+    """
+    num_envs games behind reset(seed) and step(actions). A game that tops
+    out (engine.Game.check_over, the rule of view.check_over) is reset
+    at once: its done flag is set for that step and the observation is
+    already the first of the new game.
+
+    >>> env = VecEnv(2, seed=0)
+    >>> obs = env.reset(seed=0)
+    >>> obs.cells.shape, len(obs.current)
+    ((2, 22, 10), 2)
+    >>> obs, rewards, dones = env.step([6, 6])
+    >>> sum(1 for item in env.cells if item), list(dones)
+    (8, [0, 0])
+    >>> obs is env.step([0, 0])[0]
+    True
+    """
+
+    def __init__(self, num_envs, num_cols=10, num_rows=22, seed=None, gravity_steps=1):
+        """
+        Parameters
+        ----------
+        num_envs:
+            type: int
+            brief: number of games
+        num_cols, num_rows:
+            type: int
+            brief: (optional) size of the boards
+        seed:
+            type: any
+            brief: (optional) seed of the seeds of the games created by auto-reset
+        gravity_steps:
+            type: int
+            brief: (optional) steps per row of gravity, 0 for none
+        """
+        self.num_envs = num_envs
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.gravity_steps = gravity_steps
+        self.random = random.Random(seed)
+        num_cells = num_cols * num_rows
+        self._zeros = bytes(num_cells)
+        self.cells = bytearray(num_envs * num_cells)
+        self.current = bytearray(num_envs)
+        self.next = bytearray(num_envs)
+        self.held = bytearray(num_envs)
+        self.rotation = bytearray(num_envs)
+        self.x = array('h', bytes(2 * num_envs))
+        self.y = array('h', bytes(2 * num_envs))
+        self.score = array('q', bytes(8 * num_envs))
+        self.rewards = array('d', bytes(8 * num_envs))
+        self.dones = bytearray(num_envs)
+        self.steps = 0
+        cells = memoryview(self.cells)
+        self.boards = [SharedBoard(cells[i * num_cells:(i + 1) * num_cells], num_cols, num_rows)
+                       for i in range(num_envs)]
+        self.games = [None] * num_envs
+        self.obs = Observation(cells.cast('B', (num_envs, num_rows, num_cols)), memoryview(self.current),
+                               memoryview(self.next), memoryview(self.held), memoryview(self.rotation),
+                               memoryview(self.x), memoryview(self.y), memoryview(self.score))
+
+    def _new_game(self, i, seed):
+        board = self.boards[i]
+        board.grid[:] = self._zeros
+        self.games[i] = Game(board=board, seed=seed)
+
+    def _observe(self, i, game):
+        held = game.holder.get_item()
+        self.current[i] = game.pytro_type.value
+        self.next[i] = game.next_type.value
+        self.held[i] = held.get_type().value if held else 0
+        self.rotation[i] = game.rotation
+        self.x[i] = game.x
+        self.y[i] = game.y
+        self.score[i] = game.score
+
+    def reset(self, seed=None):
+        """
+        Start every game over; game i is seeded with seed + i if seed is
+        given. Returns the observation buffers.
+        """
+        if seed is not None:
+            self.random.seed(seed)
+        for i in range(self.num_envs):
+            self._new_game(i, None if seed is None else seed + i)
+            self._observe(i, self.games[i])
+        self.steps = 0
+        return self.obs
+
+    def step(self, actions):
+        """
+        Apply one action index of ACTION_NAMES per game, then gravity.
+
+        Returns
+        -------
+            type: tuple(Observation, array, bytearray)
+            brief: the observation buffers, the score gained by each game in
+            this step and whether each game topped out (and was reset)
+        """
+        self.steps += 1
+        gravity = self.gravity_steps and self.steps % self.gravity_steps == 0
+        rewards = self.rewards
+        dones = self.dones
+        games = self.games
+        for i in range(self.num_envs):
+            game = games[i]
+            score = game.score
+            action = ACTION_NAMES[actions[i]]
+            if action is not None:
+                game.apply(action)
+            if gravity:
+                game.tick()
+            rewards[i] = game.score - score
+            dones[i] = game.gameover
+            if game.gameover:
+                self._new_game(i, self.random.getrandbits(32))
+                game = games[i]
+            self._observe(i, game)
+        return self.obs, rewards, dones
@@ -0,0 +1,149 @@
+import json
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from enum import Enum, unique
+
+# ---------------------------------------------------------------------------- #
+# ---------------------------- Game Event Stream ----------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# The game pushes events into an EventRing, which never blocks and never
+# grows past its capacity: when it is full new events are dropped and
+# counted. An EventWriter thread drains the ring in batches to a file.
+
+@unique
+class EventType(Enum):
+    LOCK = 1        # value: pytromino type, extra: pieces locked so far
+    CLEAR = 2       # value: rows cleared, extra: points scored
+    HOLD = 3        # value: pytromino type put in the holder
+    HARD_DROP = 4   # value: rows dropped
+    GAME_OVER = 5   # value: final score, extra: pieces locked
+    DROPPED = 6     # value: events dropped since the last report (written by EventWriter)
+
+Event = namedtuple('Event', ['kind', 'time', 'source', 'value', 'extra'])
+
+# binary sink record: kind, time, source, value, extra
+RECORD = struct.Struct('<BdIii')
+
+
+class EventRing:
+    """
+    A bounded buffer of events that is safe to fill from the game thread
+    while one writer thread drains it.
+
+    >>> ring = EventRing(capacity=2)
+    >>> for rows in range(3):
+    ...     ring.emit(EventType.CLEAR, value=rows)
+    >>> [event.value for event in ring.drain()], ring.dropped
+    ([0, 1], 1)
+    """
+
+    def __init__(self, capacity=65536, clock=time.time):
+        self.capacity = capacity
+        self.clock = clock
+        self.dropped = 0
+        # drops already reported by a writer, kept here rather than in the
+        # writer so that a new writer over the same ring does not report
+        # them again
+        self.reported_drops = 0
+        self._events = deque()
+
+    def emit(self, kind, source=0, value=0, extra=0):
+        """
+        Add an event, or count it as dropped if the ring is full.
+        """
+        if len(self._events) >= self.capacity:
+            self.dropped += 1
+            return
+        self._events.append(Event(kind, self.clock(), source, value, extra))
+
+    def drain(self, max_events=None):
+        """
+        Remove and return up to max_events of the oldest events.
+        """
+        events = self._events
+        n = len(events) if max_events is None else min(max_events, len(events))
+        return [events.popleft() for _ in range(n)]
+
+    def __len__(self):
+        return len(self._events)
+
+
+def encode_jsonl(events):
+    return ''.join(json.dumps({'kind': event.kind.name, 'time': event.time, 'source': event.source,
+                               'value': event.value, 'extra': event.extra}) + '\n'
+                   for event in events).encode()
+
+def encode_binary(events):
+    return b''.join(RECORD.pack(event.kind.value, event.time, event.source, event.value, event.extra)
+                    for event in events)
+
+def decode_binary(data):
+    """
+    Returns the events stored in the bytes of a binary sink.
+    """
+    return [Event(EventType(kind), *fields) for kind, *fields in RECORD.iter_unpack(data)]
+
+
+class EventWriter:
+    """
+    A background thread that flushes an EventRing to a JSONL or binary file
+    every interval seconds, batch_size events per write. When the ring has
+    dropped events since the last flush, a DROPPED event is written.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'events.jsonl')
+    >>> ring = EventRing(capacity=1)
+    >>> for _ in range(2):
+    ...     ring.emit(EventType.HOLD)
+    >>> EventWriter(ring, path).start().stop()
+    >>> for _ in range(3):
+    ...     ring.emit(EventType.HOLD)
+    >>> EventWriter(ring, path).start().stop() # a new writer over the same ring
+    >>> with open(path) as f:
+    ...     [json.loads(line)['value'] for line in f if 'DROPPED' in line]
+    [1, 2]
+    """
+
+    def __init__(self, ring, path, binary=False, interval=0.1, batch_size=4096):
+        self.ring = ring
+        self.path = path
+        self.encode = encode_binary if binary else encode_jsonl
+        self.interval = interval
+        self.batch_size = batch_size
+        self.written = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='EventWriter', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        with open(self.path, 'ab') as f:
+            while not self._stop.wait(self.interval):
+                self.flush(f)
+            self.flush(f)
+
+    def flush(self, f):
+        while True:
+            batch = self.ring.drain(self.batch_size)
+            ring = self.ring
+            dropped = ring.dropped
+            if dropped != ring.reported_drops:
+                batch.append(Event(EventType.DROPPED, ring.clock(), 0, dropped - ring.reported_drops, 0))
+                ring.reported_drops = dropped
+            if not batch:
+                break
+            f.write(self.encode(batch))
+            self.written += len(batch)
+        f.flush()
+
+    def stop(self):
+        """
+        Flush what is left in the ring and wait for the thread to finish.
+        """
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,254 @@
+from board import *
+
+# ---------------------------------------------------------------------------- #
+# ------------------------- Board Feature Extraction ------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# Each row of a board is packed into an int with bit x set when the cell at
+# column x is non-zero. A whole row is then handled by a few int operations
+# instead of num_cols calls to get_board_item. Rows above the highest filled
+# cell are empty, so every scan stops at the tallest column, and rows above
+# board.get_height() (e.g. of a SparseBoard) are not read at all.
+
+FEATURE_NAMES = (
+    'aggregate_height',
+    'max_height',
+    'holes',
+    'bumpiness',
+    'row_transitions',
+    'column_transitions',
+    'wells',
+)
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+def occupied_rows(board):
+    """
+    Returns the rows of a board up to board.get_height() as lists, bottom
+    row first. The rows above are empty.
+    """
+    rows = getattr(board, 'rows', None)
+    if rows is not None:
+        return rows
+    return [board.row_items(y) for y in range(board.get_height())]
+
+def board_rows(board):
+    """
+    Returns the rows of a board as lists, bottom row first.
+    """
+    rows = occupied_rows(board)
+    if len(rows) < board.num_rows:
+        rows = rows + [[0] * board.num_cols for _ in range(board.num_rows - len(rows))]
+    return rows
+
+def row_mask(row):
+    """
+    Pack one row of items into an int.
+    >>> bin(row_mask([1, 0, 5, 0]))
+    '0b101'
+    """
+    mask = 0
+    bit = 1
+    for item in row:
+        if item:
+            mask |= bit
+        bit <<= 1
+    return mask
+
+def row_masks(board):
+    """
+    Returns one packed int per row of the board, bottom row first.
+    >>> row_masks(Board(3, 2, grid=[1, 1, 0, 0, 2, 0]))
+    [3, 2]
+
+    Only the rows below get_height() are read:
+
+    >>> class CountedBoard(SparseBoard):
+    ...     reads = 0
+    ...     def row_items(self, y):
+    ...         CountedBoard.reads += 1
+    ...         return SparseBoard.row_items(self, y)
+    >>> board = CountedBoard(4, 1000)
+    >>> board.set_cell(1, 2, 3)
+    >>> masks = row_masks(board)
+    >>> len(masks), masks[2], CountedBoard.reads
+    (1000, 2, 3)
+    """
+    masks = [row_mask(row) for row in occupied_rows(board)]
+    if len(masks) < board.num_rows:
+        masks += [0] * (board.num_rows - len(masks))
+    return masks
+
+def column_heights(masks, num_cols):
+    """
+    Returns the height of each column, i.e. one more than the row of its
+    highest filled cell (0 for an empty column).
+    >>> column_heights([3, 2], 3)
+    [1, 2, 0]
+    """
+    heights = [0] * num_cols
+    seen = 0
+    full = (1 << num_cols) - 1
+    for y in range(len(masks) - 1, -1, -1):
+        new = masks[y] & ~seen
+        seen |= new
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = y + 1
+            new ^= low
+        if seen == full:
+            break
+    return heights
+
+def mask_features(masks, num_cols, heights=None):
+    """
+    Computes the features named in FEATURE_NAMES from packed rows.
+
+    Parameters
+    ----------
+    masks:
+        type: list[int]
+        brief: the packed rows, bottom row first
+    num_cols:
+        type: int
+        brief: number of columns of the board
+    heights:
+        type: list[int]
+        brief: (optional) the column heights, if they are already known
+    Returns
+    -------
+        type: list[int]
+        brief: the feature values, in the order of FEATURE_NAMES
+    """
+    if heights is None:
+        heights = column_heights(masks, num_cols)
+    top = max(heights) if heights else 0
+    full = (1 << num_cols) - 1
+    left_wall = 1
+    right_wall = 1 << (num_cols - 1) if num_cols else 0
+
+    holes = 0
+    row_transitions = 0
+    column_transitions = 0
+    wells = 0
+    covered = 0
+    above = 0
+    well_depth = [0] * num_cols
+    prev_wells = 0
+    for y in range(top - 1, -1, -1):
+        mask = masks[y]
+        empty = full & ~mask
+        holes += popcount(covered & empty)
+        covered |= mask
+        # walls count as filled cells
+        padded = (mask << 1) | 1 | (1 << (num_cols + 1))
+        row_transitions += popcount((padded ^ (padded >> 1)) & ((full << 1) | 1))
+        column_transitions += popcount(mask ^ above)
+        above = mask
+        row_wells = empty & ((mask << 1) | left_wall) & ((mask >> 1) | right_wall)
+        new = row_wells
+        while new:
+            low = new & -new
+            x = low.bit_length() - 1
+            well_depth[x] = well_depth[x] + 1 if prev_wells & low else 1
+            wells += well_depth[x]
+            new ^= low
+        prev_wells = row_wells
+    # the floor counts as filled
+    column_transitions += popcount(above ^ full) if top else 0
+
+    bumpiness = 0
+    for x in range(num_cols - 1):
+        bumpiness += abs(heights[x] - heights[x + 1])
+    return [sum(heights), top, holes, bumpiness, row_transitions, column_transitions, wells]
+
+def extract(board):
+    """
+    Returns the feature vector of a board, in the order of FEATURE_NAMES.
+
+    >>> board = Board(4, 4, grid=[1, 1, 0, 1,
+    ...                           1, 0, 0, 1,
+    ...                           1, 1, 0, 0,
+    ...                           0, 0, 0, 0])
+    >>> dict(zip(FEATURE_NAMES, extract(board)))['holes']
+    1
+    >>> extract(board)
+    [8, 3, 1, 5, 6, 6, 1]
+    """
+    # the features only look at rows below the tallest column
+    masks = [row_mask(row) for row in occupied_rows(board)]
+    return mask_features(masks, board.num_cols)
+
+def extract_batch(boards):
+    """
+    Returns the feature vectors of many boards, one list per board.
+    """
+    return [extract(board) for board in boards]
+
+
+class FeatureTracker:
+    """
+    Keeps the packed rows and column heights of a board up to date while the
+    board changes, so features can be read without converting the whole
+    board again. Mirror every write to the board with set_cell or pop_row.
+
+    >>> tracker = FeatureTracker(Board(3, 3, cell_item=0))
+    >>> tracker.set_cell(0, 0, 1)
+    >>> tracker.set_cell(0, 1, 1)
+    >>> tracker.heights
+    [2, 0, 0]
+    >>> tracker.pop_row(0)
+    >>> tracker.heights
+    [1, 0, 0]
+    >>> tracker.features() == extract(Board(3, 3, grid=[1, 0, 0, 0, 0, 0, 0, 0, 0]))
+    True
+    """
+
+    def __init__(self, board):
+        self.num_cols = board.num_cols
+        self.masks = row_masks(board)
+        self.heights = column_heights(self.masks, self.num_cols)
+
+    def _drop_height(self, x):
+        bit = 1 << x
+        y = self.heights[x] - 1
+        while y >= 0 and not self.masks[y] & bit:
+            y -= 1
+        self.heights[x] = y + 1
+
+    def set_cell(self, x, y, item):
+        bit = 1 << x
+        if item:
+            self.masks[y] |= bit
+            if y >= self.heights[x]:
+                self.heights[x] = y + 1
+        else:
+            self.masks[y] &= ~bit
+            if y == self.heights[x] - 1:
+                self._drop_height(x)
+
+    def pop_row(self, y):
+        del self.masks[y]
+        self.masks.append(0)
+        for x in range(self.num_cols):
+            if self.heights[x] > y:
+                self.heights[x] -= 1
+                if self.heights[x] == y:
+                    self._drop_height(x)
+
+    def insert_row(self, y, row):
+        """
+        Mirror Board.insert_row; the top row must be empty.
+        """
+        mask = row_mask(row)
+        self.masks.insert(y, mask)
+        self.masks.pop()
+        for x in range(self.num_cols):
+            if self.heights[x] > y:
+                self.heights[x] += 1
+            elif mask >> x & 1:
+                self.heights[x] = y + 1
+
+    def features(self):
+        return mask_features(self.masks, self.num_cols, self.heights)
@@ -0,0 +1,128 @@
+import struct
+from board import *
+
+# ---------------------------------------------------------------------------- #
+# ------------------------ Board Codec and Fixture Files --------------------- #
+# ---------------------------------------------------------------------------- #
+
+# Text: one board per line, "<num_cols> <num_rows> <cells>", where cells has
+# one character per item, 0-9 then a-z for items 10-35, in Board.grid order
+# (bottom row first) with a '/' between rows. Blank lines and lines starting
+# with '#' are skipped.
+#
+# Binary: MAGIC, then per board num_cols and num_rows (2 bytes each, little
+# endian) followed by the items, one byte each.
+#
+# Both directions go through bytes.translate, so encoding and parsing are
+# linear in the number of cells.
+
+MAGIC = b'PYTB'
+SIZE = struct.Struct('<HH')
+
+DIGITS = b'0123456789abcdefghijklmnopqrstuvwxyz'
+_ENCODE_TABLE = DIGITS + b'?' * (256 - len(DIGITS))
+_DECODE_TABLE = bytearray(b'\xff' * 256)
+for _value, _digit in enumerate(DIGITS):
+    _DECODE_TABLE[_digit] = _value
+    _DECODE_TABLE[DIGITS.upper()[_value]] = _value
+_DECODE_TABLE = bytes(_DECODE_TABLE)
+
+def dumps(board):
+    """
+    Returns board as one line of text, items must be ints from 0 to 35.
+    >>> dumps(Board(3, 2, grid=[5, 4, 1, 3, 0, 6]))
+    '3 2 541/306'
+    >>> dumps(Board(2, 1, grid=[36, 0]))
+    Traceback (most recent call last):
+    ...
+    ValueError: board items must be ints from 0 to 35
+    """
+    cols = board.num_cols
+    try:
+        data = bytes(board.grid).translate(_ENCODE_TABLE)
+    except (TypeError, ValueError):
+        data = b'?'
+    if b'?' in data:
+        raise ValueError('board items must be ints from 0 to 35')
+    rows = [data[y * cols:(y + 1) * cols] for y in range(board.num_rows)]
+    return f'{cols} {board.num_rows} ' + b'/'.join(rows).decode('ascii')
+
+def loads(line, board_type=Board):
+    """
+    Parse one line of text written by dumps.
+    >>> loads('3 2 541/306') == Board(3, 2, grid=[5, 4, 1, 3, 0, 6])
+    True
+    """
+    try:
+        cols, rows, cells = line.split(None, 2)
+        cols = int(cols)
+        rows = int(rows)
+    except ValueError:
+        raise ValueError(f'malformed board: {line[:40]!r}') from None
+    data = cells.strip().encode('ascii').translate(_DECODE_TABLE, b'/')
+    if len(data) != cols * rows or 255 in data:
+        raise ValueError(f'malformed cells for a {cols} x {rows} board: {cells[:40]!r}')
+    return board_type(cols, rows, grid=list(data))
+
+def dump_bytes(board):
+    """
+    Returns board as one binary record, items must be ints from 0 to 255.
+    """
+    return SIZE.pack(board.num_cols, board.num_rows) + bytes(board.grid)
+
+def load_bytes(data, board_type=Board):
+    """
+    Parse one binary record written by dump_bytes.
+    >>> load_bytes(dump_bytes(Board(4, 1, grid=[9, 2, 4, 1]))).grid
+    [9, 2, 4, 1]
+    """
+    cols, rows = SIZE.unpack_from(data)
+    cells = data[SIZE.size:SIZE.size + cols * rows]
+    if len(cells) != cols * rows:
+        raise ValueError('truncated board record')
+    return board_type(cols, rows, grid=list(cells))
+
+
+def write_fixtures(path, boards, binary=False):
+    """
+    Write boards, any iterable, to a fixture file one at a time.
+    """
+    with open(path, 'wb') as f:
+        if binary:
+            f.write(MAGIC)
+            for board in boards:
+                f.write(dump_bytes(board))
+        else:
+            for board in boards:
+                f.write(dumps(board).encode('ascii') + b'\n')
+
+def iter_fixtures(path, board_type=Board):
+    """
+    Iterate over the boards of a text or binary fixture file, reading one
+    board at a time, so files of any size can be scanned.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'boards.txt')
+    >>> write_fixtures(path, [test_board_1, test_board_2])
+    >>> [board.grid for board in iter_fixtures(path)]
+    [[5, 4, 1, 3, 0, 6], [9, 2, 4, 1]]
+    >>> write_fixtures(path, [test_board_1, test_board_2], binary=True)
+    >>> [board.grid for board in iter_fixtures(path)]
+    [[5, 4, 1, 3, 0, 6], [9, 2, 4, 1]]
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            while True:
+                size = f.read(SIZE.size)
+                if not size:
+                    return
+                if len(size) != SIZE.size:
+                    raise ValueError('truncated board record')
+                cols, rows = SIZE.unpack(size)
+                yield load_bytes(size + f.read(cols * rows), board_type)
+        else:
+            f.seek(0)
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith(b'#'):
+                    yield loads(line.decode('ascii'), board_type)
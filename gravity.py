@@ -0,0 +1,163 @@
+import time
+
+# ---------------------------------------------------------------------------- #
+# ------------------------- Gravity and Lock Delay --------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# The game advances in fixed ticks. Gravity is measured in rows per tick and
+# may be fractional (1/20 falls one row every 20 ticks) or larger than one
+# (several rows per tick), up to MAX_GRAVITY. A pytromino that cannot fall
+# locks after lock_delay ticks on the ground.
+
+MAX_GRAVITY = 20
+
+# seconds per row of each level, as selected by view.set_level
+LEVEL_DELAYS = (0.4, 0.3, 0.2, 0.1)
+
+def speed_for_delay(delay, tick_rate):
+    """
+    Returns the gravity, in rows per tick, of falling one row every delay
+    seconds with tick_rate ticks per second.
+    >>> speed_for_delay(0.25, 20)
+    0.2
+    >>> speed_for_delay(0.0001, 60)
+    20
+    """
+    return min(MAX_GRAVITY, 1 / (delay * tick_rate))
+
+
+class GravityCurve:
+    """
+    The gravity of a level as the game goes on. With acceleration, the time
+    per row shrinks by accel_factor for every pytromino locked, like
+    delay_cpy in view.py.
+
+    >>> curve = GravityCurve(level=1, tick_rate=30, acceleration=True)
+    >>> round(curve.speed(0), 4), round(curve.speed(100), 4)
+    (0.1111, 0.2243)
+    """
+
+    def __init__(self, level=1, tick_rate=60, acceleration=False, accel_factor=0.993):
+        self.delay = LEVEL_DELAYS[level]
+        self.tick_rate = tick_rate
+        self.acceleration = acceleration
+        self.accel_factor = accel_factor
+
+    def speed(self, pieces):
+        delay = self.delay * self.accel_factor ** pieces if self.acceleration else self.delay
+        return speed_for_delay(delay, self.tick_rate)
+
+
+class Gravity:
+    """
+    Fractional gravity with a lock delay, advanced one tick at a time.
+
+    >>> gravity = Gravity(0.5, lock_delay=2)
+    >>> [gravity.rows_due() for _ in range(4)]
+    [0, 1, 0, 1]
+    >>> gravity.set_speed(2.5)
+    >>> [gravity.rows_due() for _ in range(2)]
+    [2, 3]
+    >>> [gravity.lock_due(True) for _ in range(2)]
+    [False, True]
+    """
+
+    def __init__(self, speed=1 / 60, lock_delay=30):
+        """
+        Parameters
+        ----------
+        speed:
+            type: float
+            brief: (optional) rows per tick, at most MAX_GRAVITY
+        lock_delay:
+            type: int
+            brief: (optional) ticks a pytromino may rest on the ground before it locks
+        """
+        self.lock_delay = lock_delay
+        self.set_speed(speed)
+        self.reset()
+
+    def set_speed(self, speed):
+        self.speed = min(MAX_GRAVITY, speed)
+
+    def reset(self):
+        """
+        Start over for a new pytromino.
+        """
+        self.progress = 0.0
+        self.lock_timer = 0
+
+    def rows_due(self):
+        """
+        Advance one tick and return the whole rows to fall during it.
+        """
+        self.progress += self.speed
+        rows = int(self.progress)
+        self.progress -= rows
+        return rows
+
+    def lock_due(self, grounded):
+        """
+        Advance the lock timer one tick. Returns True when a pytromino that
+        has been grounded for lock_delay ticks should lock.
+        """
+        if not grounded:
+            self.lock_timer = 0
+            return False
+        self.lock_timer += 1
+        return self.lock_timer >= self.lock_delay
+
+    def step(self, game):
+        """
+        Apply one tick of gravity to an engine.Game: fall every row due (as
+        far as the pytromino can go), and lock once the lock delay runs out.
+        Returns the number of rows cleared.
+        """
+        if game.gameover:
+            return 0
+        pieces = game.pieces
+        rows = self.rows_due()
+        while rows and game.can_drop():
+            game.y -= 1
+            rows -= 1
+        grounded = not game.can_drop()
+        if grounded:
+            self.progress = 0.0
+        if self.lock_due(grounded):
+            lines = game.lock()
+        else:
+            lines = 0
+            game.check_over()
+        if game.pieces != pieces:
+            self.reset()
+        return lines
+
+
+class TickClock:
+    """
+    Paces a loop at a fixed number of ticks per second. wait() sleeps until
+    the next tick is due and returns how many ticks are due, more than one
+    when the loop fell behind, so that the game keeps its speed however long
+    each loop takes. Deadlines are absolute, so rounding errors do not add up.
+    """
+
+    def __init__(self, tick_rate, max_catch_up=5, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = clock() + self.interval
+
+    def wait(self):
+        now = self.clock()
+        if now < self.deadline:
+            self.sleep(self.deadline - now)
+            now = self.deadline
+        due = 1 + int((now - self.deadline) / self.interval)
+        if due > self.max_catch_up:
+            # too far behind: give up on the backlog rather than spiral
+            due = self.max_catch_up
+            self.deadline = now + self.interval
+        else:
+            self.deadline += due * self.interval
+        return due
@@ -0,0 +1,161 @@
+from collections import deque
+from board import *
+
+# ---------------------------------------------------------------------------- #
+# ------------------------------- Undo History ------------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# A game records every step (a lock, a hold, ...) as a Delta holding only
+# what changed: the cells written, the rows removed, and the game state
+# before and after (pytromino, position, holder, score...). The state is
+# whatever the game passes in; it is stored as is, so it must not be
+# mutated afterwards. Undo and redo replay a delta backward or forward in
+# time proportional to its size. The oldest deltas are dropped once the
+# stored cells exceed the capacity.
+
+
+class Delta:
+    """
+    The changes of one step of a game.
+    """
+
+    def __init__(self, before):
+        self.before = before
+        self.after = None
+        # (x, y, old item, new item), in the order written
+        self.cells = []
+        # (y, items of the row), in the order removed
+        self.rows = []
+
+    def size(self):
+        """
+        Returns the number of cells stored, the unit of History.capacity.
+        """
+        return 1 + len(self.cells) + sum(len(row) for _, row in self.rows)
+
+    def undo(self, board, tracker=None):
+        """
+        Put the removed rows back, then the old items of the written cells.
+        """
+        for y, row in reversed(self.rows):
+            insert_row(board, y, row)
+            if tracker is not None:
+                tracker.insert_row(y, row)
+        for x, y, old, _ in reversed(self.cells):
+            board.set_cell(x, y, old)
+            if tracker is not None:
+                tracker.set_cell(x, y, old)
+
+    def redo(self, board, tracker=None):
+        for x, y, _, new in self.cells:
+            board.set_cell(x, y, new)
+            if tracker is not None:
+                tracker.set_cell(x, y, new)
+        for y, _ in self.rows:
+            pop_row(board, y)
+            if tracker is not None:
+                tracker.pop_row(y)
+
+
+class History:
+    """
+    A bounded history of deltas with undo and redo. Recording a new step
+    after an undo drops the steps that could have been redone.
+
+    >>> board = Board(2, 2, grid=[0, 0, 1, 0])
+    >>> history = History()
+    >>> history.begin('spawned')
+    >>> history.set_cell(0, 0, 0, 3); board.set_cell(0, 0, 3)
+    >>> history.set_cell(1, 0, 0, 4); board.set_cell(1, 0, 4)
+    >>> history.pop_row(0, board.row_items(0)); pop_row(board, 0)
+    >>> history.commit('locked')
+    >>> board.grid
+    [1, 0, 0, 0]
+    >>> history.undo(board), board.grid
+    ('spawned', [0, 0, 1, 0])
+    >>> history.redo(board), board.grid
+    ('locked', [1, 0, 0, 0])
+    """
+
+    def __init__(self, capacity=100000):
+        """
+        Parameters
+        ----------
+        capacity:
+            type: int
+            brief: (optional) the most cells (see Delta.size) to keep
+        """
+        self.capacity = capacity
+        self.deltas = deque()
+        # number of deltas that can be undone; deltas[pos:] can be redone
+        self.pos = 0
+        self.stored = 0
+        self.pending = None
+
+    def begin(self, state):
+        """
+        Start recording a step from the game state before it.
+        """
+        self.pending = Delta(state)
+
+    def set_cell(self, x, y, old, new):
+        if self.pending is not None:
+            self.pending.cells.append((x, y, old, new))
+
+    def pop_row(self, y, row):
+        """
+        Record that row y, with items row, is about to be removed.
+        """
+        if self.pending is not None:
+            self.pending.rows.append((y, row))
+
+    def commit(self, state):
+        """
+        Finish the step with the game state after it.
+        """
+        delta = self.pending
+        if delta is None:
+            return
+        self.pending = None
+        delta.after = state
+        deltas = self.deltas
+        while len(deltas) > self.pos:
+            self.stored -= deltas.pop().size()
+        deltas.append(delta)
+        self.pos += 1
+        self.stored += delta.size()
+        while self.stored > self.capacity and len(deltas) > 1:
+            self.stored -= deltas.popleft().size()
+            self.pos -= 1
+
+    def can_undo(self):
+        return self.pos > 0
+
+    def can_redo(self):
+        return self.pos < len(self.deltas)
+
+    def undo(self, board, tracker=None):
+        """
+        Undo the last step on board (and on a features.FeatureTracker of
+        it). Returns the state before the step, or None if there is none.
+        """
+        if not self.can_undo():
+            return None
+        self.pos -= 1
+        delta = self.deltas[self.pos]
+        delta.undo(board, tracker)
+        return delta.before
+
+    def redo(self, board, tracker=None):
+        """
+        Redo the next undone step. Returns the state after it, or None.
+        """
+        if not self.can_redo():
+            return None
+        delta = self.deltas[self.pos]
+        self.pos += 1
+        delta.redo(board, tracker)
+        return delta.after
+
+    def __len__(self):
+        return len(self.deltas)
@@ -0,0 +1,126 @@
+from shapes import ORIENTATIONS
+
+# ---------------------------------------------------------------------------- #
+# ---------------------------- Wall Kick Tables ------------------------------ #
+# ---------------------------------------------------------------------------- #
+
+# A rotation that does not fit where it is tries a short list of shifts (the
+# kicks of the Super Rotation System) and takes the first that fits. The
+# kicks are defined for the SRS shapes, which rotate around the center of
+# their bounding box, while the shapes of pytro_dict rotate around their
+# (0, 0) reference block. So each spawn shape is matched to the SRS shape it
+# is a translation of, and that translation, carried through the rotations,
+# gives the shift of the reference block that makes a rotation of pytro_dict
+# cover the same cells as the SRS rotation. It is added to every kick, which
+# also means an O no longer wobbles when rotated.
+#
+# Everything is computed once: KICKS[type][rotation][turns] is the tuple of
+# shifts of the reference block to try, in order, when rotating turns times
+# clockwise (in the sense of rotate_block_90_cw) from a rotation index of
+# shapes.ORIENTATIONS. engine.Game.transform and view.rotate_pytro rotate a
+# pytromino their own way and then try these shifts in order.
+
+# SRS shapes in their spawn state and their center of rotation, doubled so
+# that the centers between cells are integers. y points up as on the board.
+_SRS_PIECES = (
+    ((-1, 0), (0, 0), (1, 0), (0, 1)), (0, 0), 'JLSTZ',   # T
+    ((-1, 1), (-1, 0), (0, 0), (1, 0)), (0, 0), 'JLSTZ',  # J
+    ((1, 1), (-1, 0), (0, 0), (1, 0)), (0, 0), 'JLSTZ',   # L
+    ((-1, 0), (0, 0), (0, 1), (1, 1)), (0, 0), 'JLSTZ',   # S
+    ((-1, 1), (0, 1), (0, 0), (1, 0)), (0, 0), 'JLSTZ',   # Z
+    ((-1, 0), (0, 0), (1, 0), (2, 0)), (1, -1), 'I',
+    ((0, 0), (1, 0), (0, 1), (1, 1)), (1, 1), 'O',
+)
+
+# SRS states 0, R (one clockwise turn), 2, L -> 0, 1, 2, 3.
+# (from state, to state) -> kicks, the first one being no kick
+_SRS_KICKS = {
+    'JLSTZ': {
+        (0, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+        (1, 0): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+        (1, 2): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+        (2, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+        (2, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+        (3, 2): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+        (3, 0): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+        (0, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    },
+    'I': {
+        (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+        (1, 0): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+        (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+        (2, 1): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+        (2, 3): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+        (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+        (3, 0): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+        (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+    },
+    'O': {},
+}
+
+def _srs_turn(pos, center):
+    """
+    One clockwise turn of a doubled position around a doubled center.
+    """
+    return center[0] + pos[1] - center[1], center[1] - pos[0] + center[0]
+
+def _turn(pos):
+    """
+    One turn of rotate_block_90_cw around (0, 0).
+    """
+    return -pos[1], pos[0]
+
+def _srs_match(blocks):
+    """
+    Returns (kick table name, doubled center, SRS state, doubled translation
+    from blocks to that state) for a spawn shape of pytro_dict. A shape such
+    as S matches two states; the one with the smallest translation wins, so
+    that pytrominos keep rotating around their reference block where SRS
+    allows it.
+    """
+    min_x = min(x for x, _ in blocks)
+    min_y = min(y for _, y in blocks)
+    matches = []
+    for cells, center, table in zip(_SRS_PIECES[::3], _SRS_PIECES[1::3], _SRS_PIECES[2::3]):
+        cells = [(2 * x, 2 * y) for x, y in cells]
+        for state in range(4):
+            cell_min_x = min(x for x, _ in cells)
+            cell_min_y = min(y for _, y in cells)
+            shift = (cell_min_x - 2 * min_x, cell_min_y - 2 * min_y)
+            if {(2 * x + shift[0], 2 * y + shift[1]) for x, y in blocks} == set(cells):
+                matches.append((abs(shift[0]) + abs(shift[1]), len(matches), table, center, state, shift))
+            cells = [_srs_turn(pos, center) for pos in cells]
+    if not matches:
+        raise ValueError(f'No SRS shape matches {blocks}')
+    return min(matches)[2:]
+
+def _build_kicks():
+    # rotate_block_90_cw turns the board the other way from the SRS clockwise
+    # turn, so one turn of pytro_dict is one step back through the SRS states
+    direction = 1 if _turn((1, 0)) == _srs_turn((1, 0), (0, 0)) else -1
+    table = {}
+    for pytromino_type, rotations in ORIENTATIONS.items():
+        name, center, state, shift = _srs_match(rotations[0])
+        # translation from rotation k of pytro_dict to its SRS state, doubled
+        shifts = []
+        offset = (shift[0] - center[0], shift[1] - center[1])
+        for k in range(4):
+            shifts.append((offset[0] + center[0], offset[1] + center[1]))
+            offset = _turn(offset)
+        by_rotation = []
+        for k in range(4):
+            by_turns = []
+            for turns in range(4):
+                target = (k + turns) & 3
+                base_x = shifts[target][0] - shifts[k][0]
+                base_y = shifts[target][1] - shifts[k][1]
+                assert base_x % 2 == 0 and base_y % 2 == 0
+                srs_from = (state + direction * k) & 3
+                srs_to = (state + direction * target) & 3
+                kicks = _SRS_KICKS[name].get((srs_from, srs_to), ((0, 0),))
+                by_turns.append(tuple((base_x // 2 + dx, base_y // 2 + dy) for dx, dy in kicks))
+            by_rotation.append(tuple(by_turns))
+        table[pytromino_type] = tuple(by_rotation)
+    return table
+
+KICKS = _build_kicks()
@@ -282,15 +282,23 @@ def validated_apply_rot(pytromino, fn, validator):
     >>> S0
     <Pytromino [(0, 0), (0, -1), (1, 0), (1, 1)], (77, 184, 72), Types.S, (0, 0)>
     """
-    new_pytro = copy.deepcopy(pytromino)
-    validated = []
+    # fn is applied once per block, and the first invalid block stops the loop
+    center_rot = pytromino.center_rot
+    new_blocks_pos = []
     for pos in pytromino.blocks_pos:
-        if pos == pytromino.center_rot:
-            validated.append(validator(pos))
-        else:
-            validated.append(validator(fn(pos)))
-    if all(validated):
-        new_pytro.blocks_pos = list(map(fn, pytromino.blocks_pos))
+        new_pos = fn(pos)
+        if not validator(pos if pos == center_rot else new_pos):
+            return copy_pytromino(pytromino)
+        new_blocks_pos.append(new_pos)
+    return copy_pytromino(pytromino, new_blocks_pos)
+
+def copy_pytromino(pytromino, blocks_pos=None):
+    """ 
+    Returns a copy of pytromino, with blocks_pos replaced if given. Every other
+    attribute is immutable, so this is equivalent to copy.deepcopy but cheaper.
+    """
+    new_pytro = copy.copy(pytromino)
+    new_pytro.blocks_pos = list(pytromino.blocks_pos if blocks_pos is None else blocks_pos)
     return new_pytro
 
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,59 @@
+# ---------------------------------------------------------------------------- #
+# ------------------------------- Color Schemes ------------------------------ #
+# ---------------------------------------------------------------------------- #
+
+# Shared by every front end: view.py draws with the turtle color names, the
+# terminal renderer converts them with COLOR_RGB.
+
+color_scheme = [
+    # order = board, background, 7tiles, screen background, text color
+
+    # the classic board, just the way everybody loves the blocks to be like
+    ['black','lightblue', 'yellow', 'orange', 'green', 'purple', 'blue', 'red', 'wheat', 'black'],
+    # a glacial color designed to hurt your eyes
+    ['snow', 'cornflower blue', 'royal blue', 'powder blue', 'sky blue', 'steel blue', 'light blue', 'deep sky blue', 'alice blue', 'navy'],
+    # the peacock color design, blue green, and a tiny bit of light orange
+    ['azure', 'light sea green', 'cadet blue', 'coral','gold','medium aquamarine','cornflower blue', 'turquoise','light slate gray', 'aquamarine'],
+    # some of our favorite food, now in turtle colors
+    ['antique white', 'salmon', 'light salmon', 'dark salmon', 'tomato', 'coral', 'orange red', 'chocolate', 'cornsilk', 'maroon']]
+
+# (r, g, b) of every color name used in color_scheme, as Tk defines them
+COLOR_RGB = {
+    'black': (0, 0, 0),
+    'lightblue': (173, 216, 230),
+    'yellow': (255, 255, 0),
+    'orange': (255, 165, 0),
+    'green': (0, 255, 0),
+    'purple': (160, 32, 240),
+    'blue': (0, 0, 255),
+    'red': (255, 0, 0),
+    'wheat': (245, 222, 179),
+    'snow': (255, 250, 250),
+    'cornflower blue': (100, 149, 237),
+    'royal blue': (65, 105, 225),
+    'powder blue': (176, 224, 230),
+    'sky blue': (135, 206, 235),
+    'steel blue': (70, 130, 180),
+    'light blue': (173, 216, 230),
+    'deep sky blue': (0, 191, 255),
+    'alice blue': (240, 248, 255),
+    'navy': (0, 0, 128),
+    'azure': (240, 255, 255),
+    'light sea green': (32, 178, 170),
+    'cadet blue': (95, 158, 160),
+    'coral': (255, 127, 80),
+    'gold': (255, 215, 0),
+    'medium aquamarine': (102, 205, 170),
+    'turquoise': (64, 224, 208),
+    'light slate gray': (119, 136, 153),
+    'aquamarine': (127, 255, 212),
+    'antique white': (250, 235, 215),
+    'salmon': (250, 128, 114),
+    'light salmon': (255, 160, 122),
+    'dark salmon': (233, 150, 122),
+    'tomato': (255, 99, 71),
+    'orange red': (255, 69, 0),
+    'chocolate': (210, 105, 30),
+    'cornsilk': (255, 248, 220),
+    'maroon': (176, 48, 96),
+}
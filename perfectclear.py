@@ -0,0 +1,271 @@
+import time
+from collections import namedtuple
+from models import *
+from board import *
+from features import row_masks, column_heights
+from placements import FOOTPRINTS
+
+# ---------------------------------------------------------------------------- #
+# --------------------------- Perfect Clear Solver --------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# Finds a sequence of hard drops that empties a board whose blocks all lie in
+# its bottom rows (the field), using the current pytromino, the held one and
+# a queue of next types. Every block placed must stay inside the field, so a
+# field of h rows with e empty cells needs exactly e / 4 pytrominos.
+#
+# Only placements that rest on every column they span are tried: a hard drop
+# that covers an empty cell leaves it unreachable until the rows above it
+# clear, which they cannot do while the field keeps its top. Without covered
+# cells a field is fully described by its column heights, so it is encoded
+# as a tuple of heights and the number of rows left in it; the rows below
+# the lowest column are full and cleared at once.
+#
+# A search state is the field, the position of the next unplayed type in
+# the sequence (current pytromino, then the queue) and the held type. States
+# that failed once are remembered, so the many orders leading to the same
+# field are searched only once. A field is pruned when:
+# - there are not enough pytrominos left to fill it,
+# - its empty cells are split so unevenly between the two colors of a
+#   checkerboard that the T pytrominos left cannot make up the difference
+#   (every other pytromino covers two cells of each color, a T three of
+#   one and one of the other),
+# - a column filled to the top walls off a number of empty cells that is
+#   not a multiple of 4,
+# - it has more columns 3 rows below both neighbors than I pytrominos left,
+#   since nothing else rests on two columns 3 rows apart.
+
+Step = namedtuple('Step', ['hold', 'pytromino_type', 'rotation', 'x', 'y'])
+
+def _build_shapes():
+    # type -> (rotation, min_dx, max_dx, max_dy, lowest block of the first
+    # column, lowest blocks of the other columns, (dx, height above the
+    # reference block of the top of column dx)) per footprint
+    table = {}
+    for pytromino_type, footprints in FOOTPRINTS.items():
+        shapes = []
+        for footprint in footprints:
+            tops = {}
+            for dx, dy in footprint.blocks:
+                tops[dx] = max(dy + 1, tops.get(dx, dy + 1))
+            shapes.append((footprint.rotation, footprint.min_dx, footprint.max_dx, footprint.max_dy,
+                           footprint.bottoms[0], footprint.bottoms[1:], tuple(tops.items())))
+        table[pytromino_type] = tuple(shapes)
+    return table
+
+_SHAPES = _build_shapes()
+
+
+class PerfectClearSolver:
+    """
+    Searches for perfect clears with hard drops, on boards of num_cols
+    columns.
+
+    >>> board = Board(4, 4, grid=[1, 1, 1, 0] * 4)
+    >>> solver = PerfectClearSolver(4)
+    >>> solver.solve(board, Pytromino.Types.O, queue=[Pytromino.Types.I])
+    [Step(hold=True, pytromino_type=<Types.I: 1>, rotation=1, x=3, y=1)]
+    >>> solver.solve(board, Pytromino.Types.O, queue=[Pytromino.Types.O]) is None
+    True
+    >>> hurried = PerfectClearSolver(4, time_budget=0, clock=iter(range(100)).__next__)
+    >>> hurried.solve(board, Pytromino.Types.O, queue=[Pytromino.Types.I]), hurried.timed_out
+    (None, True)
+    >>> board = Board(4, 4, grid=[1, 1, 0, 0] * 2 + [0] * 8)
+    >>> [(step.pytromino_type.name, step.x, step.y) for step in solver.solve(board, Pytromino.Types.O)]
+    [('O', 2, 1)]
+    """
+
+    def __init__(self, num_cols=10, max_height=4, time_budget=0.05, clock=time.perf_counter):
+        """
+        Parameters
+        ----------
+        num_cols:
+            type: int
+            brief: (optional) the width of the boards
+        max_height:
+            type: int
+            brief: (optional) the most rows a field may have
+        time_budget:
+            type: float
+            brief: (optional) seconds a solve may take; past it, solve gives
+            up and returns None with timed_out set. None for no limit
+        clock:
+            type: Function, () -> float
+            brief: (optional) the clock the time budget is measured with
+        """
+        self.num_cols = num_cols
+        self.max_height = max_height
+        self.time_budget = time_budget
+        self.clock = clock
+        # the types of the last solve, current one first, and the number of
+        # T and I types from each position of it on
+        self.sequence = []
+        self.t_left = [0]
+        self.i_left = [0]
+        # visited states without a solution, states searched by the last
+        # solve, and whether it ran out of time
+        self.failed = set()
+        self.nodes = 0
+        self.deadline = None
+        self.timed_out = False
+
+    def solve(self, board, current, holder=None, queue=(), can_hold=True):
+        """
+        Returns a perfect clear for board, or None if there is none or none
+        was found within the time budget (then timed_out is set).
+
+        Parameters
+        ----------
+        board:
+            type: Board object
+            brief: the board in focus, empty above its bottom max_height rows.
+            It is not modified
+        current:
+            type: Pytromino.Types
+            brief: the type of the current pytromino
+        holder:
+            type: Holder object
+            brief: (optional) the holder, with the held Pytromino if any. A
+            closed holder means the current pytromino cannot be held
+        queue:
+            type: list[Pytromino.Types]
+            brief: (optional) the next types, in order
+        can_hold:
+            type: bool
+            brief: (optional) whether the current pytromino may be held
+        Returns
+        -------
+            type: list[Step] or None
+            brief: the placements in order. Step.hold means hold before
+            placing; Step.rotation and Step.x are those of a hard drop (see
+            placements.py) and Step.y the row its reference block lands on,
+            on the board left by the previous steps
+        """
+        num_cols = self.num_cols
+        if board.num_cols != num_cols:
+            raise ValueError(f'the solver is for {num_cols} columns, not {board.num_cols}')
+        masks = row_masks(board)
+        heights = column_heights(masks, num_cols)
+        if max(heights) > self.max_height:
+            raise ValueError(f'blocks above the bottom {self.max_height} rows')
+        if sum(heights) != sum(bin(mask).count('1') for mask in masks):
+            # covered empty cells, out of reach of hard drops
+            return None
+        held = None
+        if holder is not None:
+            item = holder.get_item()
+            held = item.get_type() if item else None
+            can_hold = can_hold and holder.is_open()
+        sequence = [current] + list(queue)
+        self.sequence = sequence
+        self.t_left = [0] * (len(sequence) + 1)
+        self.i_left = [0] * (len(sequence) + 1)
+        for pos in range(len(sequence) - 1, -1, -1):
+            self.t_left[pos] = self.t_left[pos + 1] + (sequence[pos] == Pytromino.Types.T)
+            self.i_left[pos] = self.i_left[pos + 1] + (sequence[pos] == Pytromino.Types.I)
+        self.failed = set()
+        self.nodes = 0
+        self.deadline = None if self.time_budget is None else self.clock() + self.time_budget
+        self.timed_out = False
+        # full rows at the bottom are cleared already
+        low = min(heights)
+        heights = tuple(height - low for height in heights)
+        if not any(heights):
+            return []
+        # the field is the lowest rows with a number of empty cells divisible
+        # by 4 that holds every block; try them from the lowest up
+        for top in range(max(heights), self.max_height - low + 1):
+            if (top * num_cols - sum(heights)) % 4 or not self._feasible(heights, top, 0, held):
+                continue
+            steps = self._search(heights, top, 0, held, can_hold)
+            if steps is not None or self.timed_out:
+                return steps
+        return None
+
+    def _feasible(self, heights, top, pos, held):
+        """
+        Whether the pytrominos left can possibly fill the field.
+        """
+        num_cols = self.num_cols
+        empty = 0
+        imbalance = 0
+        wells = 0
+        for x, height in enumerate(heights):
+            cells = top - height
+            if not cells:
+                # a wall: the cells on its left are filled on their own
+                if empty % 4:
+                    return False
+                continue
+            empty += cells
+            if cells & 1:
+                # one more cell of the color of (x, height) than of the other
+                imbalance += -1 if (x + height) & 1 else 1
+            if cells >= 3 and (x == 0 or heights[x - 1] >= height + 3) \
+                    and (x == num_cols - 1 or heights[x + 1] >= height + 3):
+                wells += 1
+        if empty > 4 * (len(self.sequence) - pos + (held is not None)):
+            return False
+        if abs(imbalance) > 2 * (self.t_left[pos] + (held == Pytromino.Types.T)):
+            return False
+        return wells <= self.i_left[pos] + (held == Pytromino.Types.I)
+
+    def _placements(self, heights, top, pytromino_type):
+        """
+        Yields (rotation, x, y, heights, top) after every hard drop of
+        pytromino_type that stays in the field and rests on every column it
+        spans, once the full rows are cleared.
+        """
+        num_cols = self.num_cols
+        for rotation, min_dx, max_dx, max_dy, (dx0, dy0), bottoms, tops in _SHAPES[pytromino_type]:
+            for x in range(-min_dx, num_cols - max_dx):
+                y = heights[x + dx0] - dy0
+                if y + max_dy >= top:
+                    continue
+                for dx, dy in bottoms:
+                    if heights[x + dx] != y + dy:
+                        break
+                else:
+                    new_heights = list(heights)
+                    for dx, dy in tops:
+                        new_heights[x + dx] = y + dy
+                    low = min(new_heights)
+                    if low:
+                        new_heights = [height - low for height in new_heights]
+                    yield rotation, x, y, tuple(new_heights), top - low
+
+    def _search(self, heights, top, pos, held, can_hold=True):
+        if not any(heights):
+            return []
+        key = (heights, top, pos, held)
+        if key in self.failed:
+            return None
+        if self.deadline is not None and self.clock() > self.deadline:
+            self.timed_out = True
+            return None
+        self.nodes += 1
+        sequence = self.sequence
+        if pos < len(sequence):
+            # (hold first, type placed, next position, held type afterwards)
+            options = [(False, sequence[pos], pos + 1, held)]
+            if can_hold:
+                if held is not None and held != sequence[pos]:
+                    options.append((True, held, pos + 1, sequence[pos]))
+                elif held is None and pos + 1 < len(sequence):
+                    options.append((True, sequence[pos + 1], pos + 2, sequence[pos]))
+        elif held is not None:
+            options = [(True, held, pos, None)]
+        else:
+            options = []
+        for hold, pytromino_type, new_pos, new_held in options:
+            for rotation, x, y, new_heights, new_top in self._placements(heights, top, pytromino_type):
+                if not self._feasible(new_heights, new_top, new_pos, new_held):
+                    continue
+                steps = self._search(new_heights, new_top, new_pos, new_held)
+                if steps is not None:
+                    return [Step(hold, pytromino_type, rotation, x, y)] + steps
+                if self.timed_out:
+                    # unsearched, so not known to fail
+                    return None
+        self.failed.add(key)
+        return None
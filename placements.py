@@ -0,0 +1,135 @@
+from collections import namedtuple
+from models import *
+from board import *
+from shapes import ORIENTATIONS
+from features import row_masks, column_heights, mask_features
+
+# ---------------------------------------------------------------------------- #
+# ------------------------ Batched Placement Scoring ------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# A placement is a rotation index (see shapes.ORIENTATIONS) and the position
+# of the (0, 0) reference block once the pytromino is hard-dropped straight
+# down at column x. Everything is computed on packed rows (see features.py),
+# so no Board or Pytromino object is created per candidate.
+
+Placement = namedtuple('Placement', ['rotation', 'x', 'y', 'lines', 'score', 'features'])
+
+class _Footprint:
+    """
+    Precomputed facts about one orientation of a pytromino type
+    """
+
+    def __init__(self, rotation, blocks):
+        self.rotation = rotation
+        self.blocks = blocks
+        self.min_dx = min(pos[0] for pos in blocks)
+        self.max_dx = max(pos[0] for pos in blocks)
+        self.min_dy = min(pos[1] for pos in blocks)
+        self.max_dy = max(pos[1] for pos in blocks)
+        # lowest block of every column, as (dx, dy)
+        bottoms = {}
+        for dx, dy in blocks:
+            bottoms[dx] = min(dy, bottoms.get(dx, dy))
+        self.bottoms = tuple(bottoms.items())
+        # row masks relative to column min_dx, as (dy, mask)
+        rows = {}
+        for dx, dy in blocks:
+            rows[dy] = rows.get(dy, 0) | (1 << (dx - self.min_dx))
+        self.rows = tuple(sorted(rows.items()))
+
+def _build_footprints():
+    table = {}
+    for pytromino_type, rotations in ORIENTATIONS.items():
+        seen = set()
+        footprints = []
+        for k, blocks in enumerate(rotations):
+            footprint = _Footprint(k, blocks)
+            # shapes that repeat under rotation only need to be scored once
+            key = tuple((dy - footprint.min_dy, mask) for dy, mask in footprint.rows)
+            if key not in seen:
+                seen.add(key)
+                footprints.append(footprint)
+        table[pytromino_type] = tuple(footprints)
+    return table
+
+FOOTPRINTS = _build_footprints()
+
+def drop_row(footprint, x, heights):
+    """
+    Returns the y of the reference block after a hard drop at column x.
+    """
+    y = -footprint.min_dy
+    for dx, dy in footprint.bottoms:
+        landing = heights[x + dx] - dy
+        if landing > y:
+            y = landing
+    return y
+
+def lock(masks, footprint, x, y, num_cols):
+    """
+    Returns the packed rows after locking a footprint at (x, y) and removing
+    full rows, and the number of rows removed. masks is not modified.
+    """
+    full = (1 << num_cols) - 1
+    new_masks = masks[:]
+    shift = x + footprint.min_dx
+    cleared = []
+    for dy, mask in footprint.rows:
+        row = new_masks[y + dy] | (mask << shift)
+        new_masks[y + dy] = row
+        if row == full:
+            cleared.append(y + dy)
+    for row_y in reversed(cleared):
+        del new_masks[row_y]
+    new_masks.extend([0] * len(cleared))
+    return new_masks, len(cleared)
+
+def score_placements(board, pytromino_type, masks=None):
+    """
+    Scores every legal hard-drop placement of a pytromino type on a board.
+
+    Parameters
+    ----------
+    board:
+        type: Board object
+        brief: the board in focus, it is not modified
+    pytromino_type:
+        type: Pytromino.Types
+        brief: the type of the pytromino to place
+    masks:
+        type: list[int]
+        brief: (optional) the packed rows of board, e.g. FeatureTracker.masks,
+        to skip converting the board again
+    Returns
+    -------
+        type: list[Placement]
+        brief: one Placement per legal (rotation, x), with the number of
+        lines cleared, the score gained (see line_clear_score) and the
+        features of the resulting board (see features.FEATURE_NAMES)
+
+    >>> board = Board(5, 4, grid=[1, 1, 1, 1, 0,
+    ...                           0, 0, 0, 0, 0,
+    ...                           0, 0, 0, 0, 0,
+    ...                           0, 0, 0, 0, 0])
+    >>> best = max(score_placements(board, Pytromino.Types.I), key=lambda p: p.score)
+    >>> best.rotation, best.x, best.y, best.lines, best.score
+    (1, 4, 1, 1, 100)
+    >>> len(score_placements(board, Pytromino.Types.O))
+    4
+    """
+    num_cols = board.num_cols
+    num_rows = board.num_rows
+    if masks is None:
+        masks = row_masks(board)
+    heights = column_heights(masks, num_cols)
+    placements = []
+    for footprint in FOOTPRINTS[pytromino_type]:
+        for x in range(-footprint.min_dx, num_cols - footprint.max_dx):
+            y = drop_row(footprint, x, heights)
+            if y + footprint.max_dy >= num_rows:
+                continue
+            new_masks, lines = lock(masks, footprint, x, y, num_cols)
+            placements.append(Placement(footprint.rotation, x, y, lines,
+                                        line_clear_score(lines), mask_features(new_masks, num_cols)))
+    return placements
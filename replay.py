@@ -0,0 +1,253 @@
+import mmap
+import struct
+from bisect import bisect_right
+from models import *
+from board import *
+from engine import Game
+
+# ---------------------------------------------------------------------------- #
+# ----------------------------- Seekable Replays ----------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# A replay is the stream of actions applied to an engine.Game, one byte per
+# action (a tick), with a keyframe of the whole game state every
+# keyframe_interval pieces. Seeking to a tick loads the keyframe before it
+# and replays at most keyframe_interval pieces worth of actions.
+#
+# File layout (little endian):
+#   header: magic, version, num_cols, num_rows, keyframe interval
+#   body: a keyframe for tick 0, then actions, interleaved with keyframes
+#   index: the tick of every keyframe, then its offset in the file (8 bytes each)
+#   footer: index offset, number of keyframes, number of ticks, end magic
+# A keyframe is its tick and game fields (see KEYFRAME), the state of the
+# random generator (625 words) and the board cells, one byte each.
+
+MAGIC = b'PYTR'
+END_MAGIC = b'PYTI'
+# 2: rotations kick (see kicks.py), so actions of version 1 replay differently
+VERSION = 2
+HEADER = struct.Struct('<4sHHHH')
+FOOTER = struct.Struct('<QQQ4s')
+# tick, pieces, score, lines, type, rotation, next type, held type, held,
+# gameover, x, y
+KEYFRAME = struct.Struct('<QIIIBBBBBBhh')
+RANDOM_STATE = struct.Struct('<625I')
+
+# action code -> Game.apply action
+REPLAY_ACTIONS = ('tick', 'left', 'right', 'down', 'cw', 'ccw', 'drop', 'hold')
+ACTION_CODES = {action: code for code, action in enumerate(REPLAY_ACTIONS)}
+
+def keyframe_size(num_cols, num_rows):
+    return KEYFRAME.size + RANDOM_STATE.size + num_cols * num_rows
+
+def encode_keyframe(game, tick):
+    """
+    Pack the state of a game after tick actions.
+    """
+    held = game.holder.get_item()
+    version, state, _ = game.random.getstate()
+    fields = KEYFRAME.pack(tick, game.pieces, game.score, game.lines, game.pytro_type.value, game.rotation,
+                           game.next_type.value, held.get_type().value if held else 0, game.held,
+                           game.gameover, game.x, game.y)
+    return fields + RANDOM_STATE.pack(*state) + bytes(game.board.grid)
+
+def decode_keyframe(data, num_cols, num_rows):
+    """
+    Returns (tick, Game) for the bytes of a keyframe.
+    """
+    tick, pieces, score, lines, current, rotation, next_type, held, is_held, gameover, x, y = \
+        KEYFRAME.unpack_from(data)
+    game = Game(num_cols, num_rows)
+    state = RANDOM_STATE.unpack_from(data, KEYFRAME.size)
+    game.random.setstate((3, state, None))
+    start = KEYFRAME.size + RANDOM_STATE.size
+    game.board.grid = data[start:start + num_cols * num_rows]
+    game.pytro_type = Pytromino.Types(current)
+    game.rotation = rotation
+    game.shape = game.shapes[game.pytro_type][rotation]
+    game.blocks = game.shape.blocks
+    game.x = x
+    game.y = y
+    game.next_type = Pytromino.Types(next_type)
+    if held:
+        game.holder.store(pytromino_factory(Pytromino.Types(held)))
+    game.held = bool(is_held)
+    game.pieces = pieces
+    game.score = score
+    game.lines = lines
+    game.gameover = bool(gameover)
+    return tick, game
+
+
+class ReplayWriter:
+    """
+    Records the actions applied to a game. Apply every action through
+    ReplayWriter.apply rather than on the game, and close() the writer (or
+    use a with statement) to write the index.
+    """
+
+    def __init__(self, path, game, keyframe_interval=50):
+        """
+        Parameters
+        ----------
+        path:
+            type: str
+            brief: the replay file, overwritten if it exists
+        game:
+            type: engine.Game
+            brief: the game to record, from its current state on
+        keyframe_interval:
+            type: int
+            brief: (optional) pieces locked between two keyframes
+        """
+        self.game = game
+        self.keyframe_interval = keyframe_interval
+        self.ticks = 0
+        self.index = []
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, game.num_cols, game.num_rows, keyframe_interval))
+        self._offset = HEADER.size
+        self._pending = bytearray()
+        self._keyframe()
+
+    def _keyframe(self):
+        self.index.append((self.ticks, self._offset + len(self._pending)))
+        self._next_keyframe = self.game.pieces + self.keyframe_interval
+        self._pending += encode_keyframe(self.game, self.ticks)
+
+    def apply(self, action):
+        """
+        Apply an action of REPLAY_ACTIONS to the game and record it.
+        Returns what Game.apply returns.
+        """
+        result = self.game.apply(action)
+        self._pending.append(ACTION_CODES[action])
+        self.ticks += 1
+        if self.game.pieces >= self._next_keyframe:
+            self._keyframe()
+        if len(self._pending) >= 65536:
+            self.flush()
+        return result
+
+    def flush(self):
+        self._file.write(self._pending)
+        self._offset += len(self._pending)
+        self._pending = bytearray()
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        ticks = [tick for tick, _ in self.index]
+        offsets = [offset for _, offset in self.index]
+        count = len(self.index)
+        self._file.write(struct.pack(f'<{count}Q', *ticks) + struct.pack(f'<{count}Q', *offsets))
+        self._file.write(FOOTER.pack(self._offset, count, self.ticks, END_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Replay:
+    """
+    A replay file opened through mmap. Opening reads only the header and
+    footer; keyframes and actions are read when they are used.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'game.pyr')
+    >>> game = Game(seed=1)
+    >>> with ReplayWriter(path, game, keyframe_interval=2) as writer:
+    ...     for action in ['left', 'drop', 'cw', 'drop', 'hold', 'drop', 'tick']:
+    ...         moved = writer.apply(action)
+    >>> replay = Replay(path)
+    >>> len(replay), replay.num_keyframes, replay.action(4)
+    (7, 2, 'hold')
+    >>> replay.seek(7).board == game.board and replay.seek(7).y == game.y
+    True
+    >>> replay.close()
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._mmap
+        magic, version, self.num_cols, self.num_rows, self.keyframe_interval = HEADER.unpack_from(data)
+        assert magic == MAGIC, 'not a Pyturis replay'
+        assert version == VERSION, f'unsupported replay version: {version}'
+        index_offset, count, self.ticks, end_magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        assert end_magic == END_MAGIC, 'replay was not closed'
+        self.num_keyframes = count
+        self.keyframe_size = keyframe_size(self.num_cols, self.num_rows)
+        self._buffer = memoryview(data)
+        self._ticks = self._buffer[index_offset:index_offset + 8 * count].cast('Q')
+        self._offsets = self._buffer[index_offset + 8 * count:index_offset + 16 * count].cast('Q')
+
+    def __len__(self):
+        return self.ticks
+
+    def keyframe(self, i):
+        """
+        Returns (tick, Game) for keyframe i.
+        """
+        offset = self._offsets[i]
+        return decode_keyframe(self._buffer[offset:offset + self.keyframe_size], self.num_cols, self.num_rows)
+
+    def _action_offset(self, i, tick):
+        return self._offsets[i] + self.keyframe_size + tick - self._ticks[i]
+
+    def _keyframe_before(self, tick):
+        return bisect_right(self._ticks, tick) - 1
+
+    def action(self, tick):
+        """
+        Returns the action applied at tick, from 0 to len(self) - 1.
+        """
+        assert 0 <= tick < self.ticks, f'tick out of range: {tick}'
+        i = self._keyframe_before(tick)
+        return REPLAY_ACTIONS[self._buffer[self._action_offset(i, tick)]]
+
+    def actions(self, start=0, stop=None):
+        """
+        Iterate over the actions from tick start to stop (excluded).
+        """
+        stop = self.ticks if stop is None else min(stop, self.ticks)
+        i = self._keyframe_before(start)
+        tick = start
+        while tick < stop:
+            end = self._ticks[i + 1] if i + 1 < self.num_keyframes else self.ticks
+            end = min(end, stop)
+            offset = self._action_offset(i, tick)
+            for code in self._buffer[offset:offset + end - tick]:
+                yield REPLAY_ACTIONS[code]
+            tick = end
+            i += 1
+
+    def seek(self, tick):
+        """
+        Returns a new Game in the state after the first tick actions.
+        """
+        assert 0 <= tick <= self.ticks, f'tick out of range: {tick}'
+        start, game = self.keyframe(self._keyframe_before(tick))
+        for action in self.actions(start, tick):
+            game.apply(action)
+        return game
+
+    def close(self):
+        """
+        Unmap the file; Games returned by the replay stay valid.
+        """
+        self._ticks.release()
+        self._offsets.release()
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+from engine import *
+
+# ---------------------------------------------------------------------------- #
+# ---------------------------- Multi-Session Server -------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# Many independent games run on one asyncio event loop. Each session has its
+# own gravity timer (loop.call_later, no task per session) and can be paired
+# with another session to exchange garbage rows.
+#
+# Protocol: one command per line, one reply line per command.
+#   left | right | cw | ccw | down | drop | hold   ->  ok <moved: 0 or 1> [over <score>]
+#   state                                          ->  state <fields, see encode_state>
+#   pair <session id>                              ->  ok 1
+#   quit                                           ->  bye
+# On connect the server sends "session <id>". The game of a session ends
+# once, and the server reports it once: a command that ends it gets the reply
+# "ok <moved> over <score>"; a game ended by gravity or by garbage gets an
+# "over <score>" line of its own, between two replies.
+
+COMMANDS = set(ACTIONS) | {'drop', 'hold'}
+
+def encode_state(game):
+    """
+    Returns the state of a game as a single line of space separated fields:
+    score, lines, pieces, current type, rotation, x, y, next type, held type
+    (0 if empty), gameover (0 or 1), and the board cells in Board.grid order.
+    """
+    held = game.holder.get_item()
+    fields = [game.score, game.lines, game.pieces, game.pytro_type.value, game.rotation,
+              game.x, game.y, game.next_type.value, held.get_type().value if held else 0,
+              int(game.gameover)]
+    return ' '.join(map(str, fields)) + ' ' + ''.join(map(str, game.board.grid))
+
+
+class Session:
+    """
+    A game hosted by the server, with its gravity timer and opponent.
+    """
+
+    def __init__(self, session_id, game, delay):
+        self.id = session_id
+        self.game = game
+        self.delay = delay
+        self.opponent = None
+        self.timer = None
+        self.writer = None
+        self.reported = False
+
+
+class GameServer:
+    """
+    Hosts independent game sessions on the running event loop.
+
+    Two loopback clients play versus: the first clears 4 rows with an I
+    dropped into a well, which sends 4 garbage rows to the second, whose game
+    soon ends. A client reading one line per command stays in step.
+
+    >>> async def versus():
+    ...     server = GameServer(delay=60, num_cols=4, num_rows=8, seed=14)
+    ...     listener = await server.start('127.0.0.1', 0)
+    ...     port = listener.sockets[0].getsockname()[1]
+    ...     async def connect():
+    ...         client = await asyncio.open_connection('127.0.0.1', port)
+    ...         print((await client[0].readline()).decode().strip())
+    ...         return client
+    ...     async def ask(client, line):
+    ...         client[1].write(line.encode() + b'\\n')
+    ...         return (await client[0].readline()).decode().strip()
+    ...     a = await connect()
+    ...     b = await connect()
+    ...     print(await ask(a, 'pair 2'))
+    ...     game_a, game_b = server.sessions[1].game, server.sessions[2].game
+    ...     print(game_a.pytro_type.name, await ask(a, 'cw'))
+    ...     well = game_a.x + game_a.blocks[0][0]
+    ...     for y in range(4):
+    ...         for x in range(4):
+    ...             if x != well:
+    ...                 game_a.board.set_cell(x, y, 1)
+    ...     print(await ask(a, 'drop'), game_a.lines, game_b.board.row_items(0).count(GARBAGE))
+    ...     reply = 'ok 1'
+    ...     while reply == 'ok 1':
+    ...         reply = await ask(b, 'drop')
+    ...     print(reply, '|', await ask(b, 'drop'), '|', (await ask(b, 'state')).split()[0])
+    ...     c = await connect()
+    ...     print(await ask(a, 'pair 3'), server.sessions[2].opponent)
+    ...     for client in (a, b, c):
+    ...         print(await ask(client, 'quit'), await client[0].read())
+    ...     server.close()
+    ...     await listener.wait_closed()
+    >>> asyncio.run(versus())
+    session 1
+    session 2
+    ok 1
+    I ok 1
+    ok 1 4 3
+    ok 1 over 100 | err game over | state
+    session 3
+    ok 1 None
+    bye b''
+    bye b''
+    bye b''
+    """
+
+    def __init__(self, delay=0.3, num_cols=10, num_rows=22, seed=None):
+        """
+        Parameters
+        ----------
+        delay:
+            type: float
+            brief: (optional) default seconds between gravity steps
+        num_cols, num_rows:
+            type: int
+            brief: (optional) size of the boards
+        seed:
+            type: int
+            brief: (optional) seed of the game of the first session, the
+            next sessions get seed + 1, seed + 2, ... Random if None
+        """
+        self.delay = delay
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.seed = seed
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._server = None
+
+    def new_session(self, delay=None, seed=None):
+        """
+        Create a session and start its gravity. Must be called from within
+        the event loop.
+        """
+        session_id = next(self._ids)
+        if seed is None and self.seed is not None:
+            seed = self.seed + session_id - 1
+        game = Game(self.num_cols, self.num_rows, seed)
+        session = Session(session_id, game, self.delay if delay is None else delay)
+        self.sessions[session_id] = session
+        self._schedule(session)
+        return session
+
+    def close_session(self, session):
+        if session.timer:
+            session.timer.cancel()
+        if session.opponent and session.opponent.opponent is session:
+            session.opponent.opponent = None
+        self.sessions.pop(session.id, None)
+
+    def pair(self, session, other):
+        """
+        Make two sessions opponents, so that rows cleared by one become
+        garbage for the other.
+        """
+        assert session is not other, 'a session cannot be paired with itself'
+        # previous opponents stop sending garbage to them
+        for paired in (session, other):
+            if paired.opponent and paired.opponent.opponent is paired:
+                paired.opponent.opponent = None
+        session.opponent = other
+        other.opponent = session
+
+    def _schedule(self, session):
+        loop = asyncio.get_running_loop()
+        session.timer = loop.call_later(session.delay, self._gravity, session)
+
+    def _gravity(self, session):
+        game = session.game
+        self._after_action(session, game.tick())
+        self._report_over(session)
+        if game.gameover:
+            session.timer = None
+        else:
+            self._schedule(session)
+
+    def _after_action(self, session, num_lines):
+        opponent = session.opponent
+        if num_lines and opponent and not opponent.game.gameover:
+            garbage = garbage_for(num_lines)
+            if garbage:
+                opponent.game.add_garbage(garbage)
+                self._report_over(opponent)
+
+    def _over_notice(self, session):
+        """
+        Returns "over <score>" the first time it is called after the game of
+        session ended, and stops its gravity; None otherwise.
+        """
+        if session.game.gameover and not session.reported:
+            session.reported = True
+            if session.timer:
+                session.timer.cancel()
+                session.timer = None
+            return f'over {session.game.score}'
+        return None
+
+    def _report_over(self, session):
+        notice = self._over_notice(session)
+        if notice and session.writer:
+            session.writer.write(f'{notice}\n'.encode())
+
+    def handle_command(self, session, line):
+        """
+        Run one protocol command for session and return the reply line.
+        """
+        parts = line.split()
+        if not parts:
+            return 'err empty command'
+        command = parts[0]
+        game = session.game
+        if command in COMMANDS:
+            if game.gameover:
+                return 'err game over'
+            lines_before = game.lines
+            moved = game.apply(command)
+            self._after_action(session, game.lines - lines_before)
+            notice = self._over_notice(session)
+            return f'ok {int(moved)} {notice}' if notice else f'ok {int(moved)}'
+        if command == 'state':
+            return 'state ' + encode_state(game)
+        if command == 'pair' and len(parts) == 2 and parts[1].isdigit():
+            other = self.sessions.get(int(parts[1]))
+            if other is None or other is session:
+                return 'err unknown session'
+            self.pair(session, other)
+            return 'ok 1'
+        return f'err unknown command: {command}'
+
+    async def _client(self, reader, writer):
+        session = self.new_session()
+        session.writer = writer
+        writer.write(f'session {session.id}\n'.encode())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode().strip()
+                if line == 'quit':
+                    writer.write(b'bye\n')
+                    break
+                writer.write((self.handle_command(session, line) + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.close_session(session)
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Listen on a local TCP port, or on a unix socket if path is given.
+        Returns the asyncio server.
+        """
+        if path:
+            self._server = await asyncio.start_unix_server(self._client, path=path)
+        else:
+            self._server = await asyncio.start_server(self._client, host, port)
+        return self._server
+
+    def close(self):
+        for session in list(self.sessions.values()):
+            self.close_session(session)
+        if self._server:
+            self._server.close()
+
+
+async def _main(host='127.0.0.1', port=8765, path=None):
+    server = GameServer()
+    listener = await server.start(host, port, path)
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        asyncio.run(_main(path=sys.argv[1]))
+    else:
+        asyncio.run(_main(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765))
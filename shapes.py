@@ -0,0 +1,79 @@
+from models import *
+
+# ---------------------------------------------------------------------------- #
+# ----------------------- Precomputed Pytromino Shapes ----------------------- #
+# ---------------------------------------------------------------------------- #
+
+# Orientation k of a type is its spawn shape from pytro_dict rotated k times
+# with the same formula as rotate_block_90_cw around (0, 0).
+
+def _rotate_cw(pos):
+    return -pos[1], pos[0]
+
+def _normalize(blocks):
+    """
+    Translate blocks so that the smallest x and y are both 0.
+    >>> sorted(_normalize([(0, 0), (-1, 0), (1, 0), (1, -1)]))
+    [(0, 1), (1, 1), (2, 0), (2, 1)]
+    """
+    min_x = min(pos[0] for pos in blocks)
+    min_y = min(pos[1] for pos in blocks)
+    return frozenset((pos[0] - min_x, pos[1] - min_y) for pos in blocks)
+
+def _build_orientations():
+    table = {}
+    for pytromino_type, args in pytro_dict.items():
+        blocks = tuple(args[0])
+        rotations = []
+        for _ in range(4):
+            rotations.append(blocks)
+            blocks = tuple(_rotate_cw(pos) for pos in blocks)
+        table[pytromino_type] = tuple(rotations)
+    return table
+
+ORIENTATIONS = _build_orientations()
+
+def _build_lookup():
+    table = {}
+    for pytromino_type, rotations in ORIENTATIONS.items():
+        lookup = {}
+        for k, blocks in enumerate(rotations):
+            lookup.setdefault(_normalize(blocks), k)
+        table[pytromino_type] = lookup
+    return table
+
+_ORIENTATION_LOOKUP = _build_lookup()
+
+def orientation_of(pytromino):
+    """
+    Returns the rotation index (0 - 3) of a pytromino, i.e. the number of
+    clockwise rotations applied to its spawn shape. Shapes that look the same
+    under several rotations (such as O) report the smallest index. Shifts are
+    ignored, so a pytromino moved around by the view keeps its orientation.
+
+    Parameters
+    ----------
+    pytromino:
+        type: Pytromino object
+        brief: the pytromino in focus
+    Returns
+    -------
+        type: int
+        brief: the rotation index of the pytromino
+
+    >>> orientation_of(pytromino_factory(Pytromino.Types.T))
+    0
+    >>> T = pytromino_factory(Pytromino.Types.T)
+    >>> T.blocks_pos = [(5, 3), (6, 3), (5, 2), (5, 4)]
+    >>> orientation_of(T)
+    1
+    >>> O = pytromino_factory(Pytromino.Types.O)
+    >>> O.blocks_pos = [_rotate_cw(pos) for pos in O.blocks_pos]
+    >>> orientation_of(O)
+    0
+    """
+    lookup = _ORIENTATION_LOOKUP[pytromino.get_type()]
+    key = _normalize(pytromino.blocks_pos)
+    if key not in lookup:
+        raise ValueError(f'Blocks do not form a {pytromino.get_type()}: {pytromino.blocks_pos}')
+    return lookup[key]
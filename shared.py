@@ -0,0 +1,244 @@
+import struct
+import sys
+import time
+from multiprocessing import shared_memory, resource_tracker
+from board import *
+
+# ---------------------------------------------------------------------------- #
+# -------------------------- Shared-Memory Boards ---------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# A block of shared memory holding num_boards boards (Python 3.8+):
+#   header: magic, num_boards, num_cols, num_rows, slot size
+#   slots: a sequence counter (8 bytes) followed by the cells, one byte each,
+#          in Board.grid order, padded to a multiple of 8 bytes
+#
+# Sequence counter protocol: a writer makes the counter odd before it touches
+# the cells and even again when it is done. A reader copies the cells and
+# retries if the counter was odd or changed in the meantime. One writer per
+# board; any number of readers.
+
+MAGIC = b'PYTS'
+HEADER = struct.Struct('<4sIHHI')
+HEADER_SIZE = 16
+
+# a reader retries this many times before it starts sleeping between retries,
+# for at most MAX_BACKOFF seconds at a time
+SPIN_RETRIES = 100
+MAX_BACKOFF = 0.001
+
+
+class BoardLayout:
+    """
+    Where each board lives in the shared block.
+
+    >>> layout = BoardLayout(2, 10, 22)
+    >>> layout.slot_size, layout.size
+    (232, 480)
+    >>> layout.cells_offset(1)
+    256
+    """
+
+    def __init__(self, num_boards, num_cols, num_rows):
+        self.num_boards = num_boards
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.num_cells = num_cols * num_rows
+        self.slot_size = 8 + (self.num_cells + 7) // 8 * 8
+        self.size = HEADER_SIZE + num_boards * self.slot_size
+
+    def seq_offset(self, i):
+        return HEADER_SIZE + i * self.slot_size
+
+    def cells_offset(self, i):
+        return self.seq_offset(i) + 8
+
+    def pack(self):
+        return HEADER.pack(MAGIC, self.num_boards, self.num_cols, self.num_rows, self.slot_size)
+
+    @staticmethod
+    def unpack(data):
+        magic, num_boards, num_cols, num_rows, slot_size = HEADER.unpack_from(data)
+        assert magic == MAGIC, 'not a shared board block'
+        layout = BoardLayout(num_boards, num_cols, num_rows)
+        assert layout.slot_size == slot_size, 'incompatible shared board layout'
+        return layout
+
+
+class SharedBoard(Board):
+    """
+    A Board whose grid is a memoryview into shared memory. Writes go straight
+    to the shared cells; items must be ints from 0 to 255.
+    """
+
+    def __init__(self, cells, num_cols, num_rows):
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+        self.grid = cells
+
+    def update_grid(self, new_grid):
+        assert len(new_grid) == len(self.grid), 'unequal grid lengths'
+        self.grid[:] = bytes(new_grid)
+
+    def restore(self, snapshot):
+        self.update_grid(snapshot)
+
+    def pop_row(self, y):
+        cols = self.num_cols
+        start = y * cols
+        end = len(self.grid)
+        self.grid[start:end - cols] = bytes(self.grid[start + cols:])
+        self.grid[end - cols:] = bytes(cols)
+
+    def push_row(self, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        cols = self.num_cols
+        self.grid[cols:] = bytes(self.grid[:-cols])
+        self.grid[:cols] = bytes(row)
+
+    def insert_row(self, y, row):
+        assert len(row) == self.num_cols, 'row length must equal num_cols'
+        cols = self.num_cols
+        start = y * cols
+        self.grid[start + cols:] = bytes(self.grid[start:-cols])
+        self.grid[start:start + cols] = bytes(row)
+
+    def __eq__(self, other):
+        assert isinstance(other, Board), 'Must compare two Board objects'
+        return self.num_cols == other.num_cols and self.num_rows == other.num_rows \
+            and list(self.grid) == list(other.grid)
+
+    def __repr__(self):
+        return f'<SharedBoard num_cols: {self.num_cols} num_rows: {self.num_rows}>'
+
+
+class SharedBoards:
+    """
+    num_boards boards in one shared memory block, created by one process and
+    attached by name from others.
+
+    >>> boards = SharedBoards.create(2, 3, 2)
+    >>> other = SharedBoards.attach(boards.name)
+    >>> with boards.writing(1):
+    ...     boards.board(1).grid[4] = 7
+    >>> list(other.read(1)), other.seq(1)
+    ([0, 0, 0, 0, 7, 0], 2)
+    >>> boards.begin_write(0) # a writer stuck mid-write
+    >>> other.read(0, timeout=0.01)
+    Traceback (most recent call last):
+    ...
+    TimeoutError: board 0 kept changing for 0.01 s while being read
+    >>> other.close(); boards.close(); boards.unlink()
+    """
+
+    def __init__(self, shm, layout):
+        self.shm = shm
+        self.name = shm.name
+        self.layout = layout
+        buf = shm.buf
+        self._seqs = [buf[layout.seq_offset(i):layout.seq_offset(i) + 8].cast('Q')
+                      for i in range(layout.num_boards)]
+        self._cells = [buf[layout.cells_offset(i):layout.cells_offset(i) + layout.num_cells]
+                       for i in range(layout.num_boards)]
+
+    @classmethod
+    def create(cls, num_boards, num_cols=10, num_rows=22, name=None):
+        layout = BoardLayout(num_boards, num_cols, num_rows)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=layout.size)
+        shm.buf[:HEADER.size] = layout.pack()
+        return cls(shm, layout)
+
+    @classmethod
+    def attach(cls, name):
+        shm = _attach_untracked(name)
+        return cls(shm, BoardLayout.unpack(shm.buf))
+
+    def __len__(self):
+        return self.layout.num_boards
+
+    def board(self, i):
+        """
+        Returns board i as a SharedBoard writing into shared memory.
+        """
+        return SharedBoard(self._cells[i], self.layout.num_cols, self.layout.num_rows)
+
+    def cells(self, i):
+        """
+        Returns a zero-copy memoryview of the cells of board i. Check seq(i)
+        before and after using it, or use read(i).
+        """
+        return self._cells[i]
+
+    def seq(self, i):
+        return self._seqs[i][0]
+
+    def begin_write(self, i):
+        self._seqs[i][0] += 1
+
+    def end_write(self, i):
+        self._seqs[i][0] += 1
+
+    def writing(self, i):
+        return _Writing(self, i)
+
+    def read(self, i, timeout=1.0):
+        """
+        Returns a consistent copy of the cells of board i, as bytes. While
+        the board is being written, the reader spins a few times, then
+        yields its core with sleeps that grow up to a millisecond, so a
+        writer descheduled mid-write can finish. TimeoutError is raised if no
+        consistent copy was read within timeout seconds (None: wait forever).
+        """
+        seq = self._seqs[i]
+        cells = self._cells[i]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempts = 0
+        while True:
+            before = seq[0]
+            if not before & 1:
+                data = bytes(cells)
+                if seq[0] == before:
+                    return data
+            attempts += 1
+            if attempts > SPIN_RETRIES:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f'board {i} kept changing for {timeout} s while being read')
+                time.sleep(min(MAX_BACKOFF, (attempts - SPIN_RETRIES) * 1e-5))
+
+    def close(self):
+        for view in self._seqs + self._cells:
+            view.release()
+        self._seqs = self._cells = []
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _attach_untracked(name):
+    """
+    Open an existing block without registering it with the resource tracker,
+    which would otherwise unlink it when this process exits. Only the process
+    that created the block should unlink it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class _Writing:
+    def __init__(self, boards, i):
+        self.boards = boards
+        self.i = i
+
+    def __enter__(self):
+        self.boards.begin_write(self.i)
+        return self.boards.board(self.i)
+
+    def __exit__(self, *exc):
+        self.boards.end_write(self.i)
@@ -0,0 +1,118 @@
+import copy
+import time
+
+# ---------------------------------------------------------------------------- #
+# ----------------------------- Game Statistics ------------------------------ #
+# ---------------------------------------------------------------------------- #
+
+class Stats:
+    """
+    Running totals of a game, updated in constant time per event. The game
+    calls on_lock and then on_clear for every pytromino that locks, on_hold
+    for every swap and on_hard_drop for every hard drop.
+
+    >>> clock = iter([0.0, 1.0, 3.0, 4.0]).__next__
+    >>> stats = Stats(clock)
+    >>> stats.on_lock(); stats.on_clear(2, 300)
+    >>> stats.on_lock(); stats.on_clear(1, 100)
+    >>> snap = stats.snapshot()
+    >>> snap['pieces'], snap['lines'], snap['score'], snap['combo'], snap['doubles']
+    (2, 3, 400, 2, 1)
+    >>> snap['pieces_per_second'], snap['max_piece_time']
+    (0.5, 2.0)
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        clock:
+            type: Function, () -> float
+            brief: (optional) returns the current time in seconds
+        """
+        self.clock = clock
+        self.start = clock()
+        self.last_lock = self.start
+        self.pieces = 0
+        self.lines = 0
+        self.score = 0
+        self.holds = 0
+        self.hard_drops = 0
+        self.hard_drop_rows = 0
+        self.combo = 0
+        self.max_combo = 0
+        # clears[n] = number of locks that cleared n rows, for n in 1 - 4
+        self.clears = [0, 0, 0, 0, 0]
+        self.total_piece_time = 0.0
+        self.max_piece_time = 0.0
+
+    def on_lock(self):
+        now = self.clock()
+        piece_time = now - self.last_lock
+        self.last_lock = now
+        self.pieces += 1
+        self.total_piece_time += piece_time
+        if piece_time > self.max_piece_time:
+            self.max_piece_time = piece_time
+
+    def on_clear(self, num_lines, points):
+        """
+        Record the rows cleared by the last lock, num_lines may be 0.
+        """
+        if num_lines:
+            self.lines += num_lines
+            self.score += points
+            self.clears[min(num_lines, 4)] += 1
+            self.combo += 1
+            if self.combo > self.max_combo:
+                self.max_combo = self.combo
+        else:
+            self.combo = 0
+
+    def on_hold(self):
+        self.holds += 1
+
+    def on_hard_drop(self, rows=0):
+        self.hard_drops += 1
+        self.hard_drop_rows += rows
+
+    def copy(self):
+        """
+        Returns an independent copy of these totals, e.g. to restore them on
+        undo.
+        >>> stats = Stats(iter([0.0, 1.0, 2.0]).__next__)
+        >>> saved = stats.copy()
+        >>> stats.on_lock(); stats.on_clear(1, 100)
+        >>> saved.pieces, saved.lines, saved.clears[1], stats.clears[1]
+        (0, 0, 0, 1)
+        """
+        new = copy.copy(self)
+        new.clears = self.clears[:]
+        return new
+
+    def snapshot(self):
+        """
+        Returns the current statistics as a dict of plain numbers, ready to
+        display or to serialize.
+        """
+        elapsed = self.clock() - self.start
+        pieces = self.pieces
+        return {
+            'elapsed': elapsed,
+            'pieces': pieces,
+            'lines': self.lines,
+            'score': self.score,
+            'holds': self.holds,
+            'hard_drops': self.hard_drops,
+            'hard_drop_rows': self.hard_drop_rows,
+            'combo': self.combo,
+            'max_combo': self.max_combo,
+            'singles': self.clears[1],
+            'doubles': self.clears[2],
+            'triples': self.clears[3],
+            'tetrises': self.clears[4],
+            'pieces_per_second': pieces / elapsed if elapsed > 0 else 0.0,
+            'lines_per_minute': self.lines * 60 / elapsed if elapsed > 0 else 0.0,
+            'avg_piece_time': self.total_piece_time / pieces if pieces else 0.0,
+            'max_piece_time': self.max_piece_time,
+        }
@@ -0,0 +1,228 @@
+import mmap
+import os
+import struct
+from models import *
+from features import row_masks, column_heights
+from placements import FOOTPRINTS, drop_row
+
+# ---------------------------------------------------------------------------- #
+# ------------------------- Surface Placement Database ----------------------- #
+# ---------------------------------------------------------------------------- #
+
+# The same surfaces come up again and again in self-play, so the placement a
+# deep search picks for a surface and a pytromino type can be looked up
+# instead of searched for. A surface is the column heights of a board minus
+# the lowest one, each capped at MAX_STEP, packed 4 bits per column below the
+# type value into one 64 bit key. Holes and absolute height are ignored: a
+# hard drop only depends on the relative heights, so a placement of the
+# database (rotation index and x of the reference block, as in
+# placements.py) is legal on any board with the same surface, short of the
+# top of the board.
+#
+# File layout (little endian): header (magic, version, num_cols, number of
+# slots, number of entries), then an open addressing hash table with linear
+# probing: the keys of every slot (8 bytes each, 0 for an empty slot), then
+# their values (4 bytes each: votes << 16 | rotation << 8 | x). The table
+# is at most half full, so a lookup reads one or two slots. The file is
+# opened through mmap read-only, so worker processes share one copy of it
+# in the page cache, and it is replaced atomically when rewritten.
+
+MAGIC = b'PYTP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+
+MAX_STEP = 15
+MAX_COLS = 15
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+def surface_key(heights, pytromino_type):
+    """
+    Returns the database key of a surface, given as column heights, and a
+    pytromino type.
+    >>> surface_key([3, 4, 3], Pytromino.Types.T) == surface_key([0, 1, 0], Pytromino.Types.T)
+    True
+    >>> hex(surface_key([0, 1, 20], Pytromino.Types.I))
+    '0x101f'
+    """
+    base = min(heights)
+    key = pytromino_type.value
+    for height in heights:
+        key = key << 4 | min(height - base, MAX_STEP)
+    return key
+
+def _slot(key, bits):
+    return (key * _GOLDEN & _MASK64) >> (64 - bits)
+
+def _pack(rotation, x, votes):
+    return min(votes, 0xffff) << 16 | rotation << 8 | x
+
+def write_db(path, entries, num_cols):
+    """
+    Write a database of entries, {key: (rotation, x, votes)}, to path. The
+    file is written beside path and then renamed over it, so readers of the
+    old file are not disturbed.
+    """
+    assert 0 < num_cols <= MAX_COLS, f'surfaces of {num_cols} columns do not fit in a key'
+    bits = 4
+    while (1 << bits) < 2 * len(entries):
+        bits += 1
+    num_slots = 1 << bits
+    keys = [0] * num_slots
+    values = [0] * num_slots
+    mask = num_slots - 1
+    for key, (rotation, x, votes) in entries.items():
+        i = _slot(key, bits)
+        while keys[i]:
+            i = (i + 1) & mask
+        keys[i] = key
+        values[i] = _pack(rotation, x, votes)
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, num_cols, num_slots, len(entries)))
+        f.write(struct.pack(f'<{num_slots}Q', *keys))
+        f.write(struct.pack(f'<{num_slots}I', *values))
+    os.replace(temp, path)
+
+
+class SurfaceDB:
+    """
+    A placement database opened read-only through mmap.
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'surfaces.db')
+    >>> key = surface_key([0, 0, 1, 1, 0], Pytromino.Types.O)
+    >>> write_db(path, {key: (0, 0, 3)}, 5)
+    >>> with SurfaceDB(path) as db:
+    ...     db.get(key), db.lookup([4, 4, 5, 5, 4], Pytromino.Types.O), len(db)
+    ((0, 0, 3), (0, 0), 1)
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.num_cols, num_slots, self.count = HEADER.unpack_from(self._mmap)
+        assert magic == MAGIC, 'not a Pyturis surface database'
+        assert version == VERSION, f'unsupported surface database version: {version}'
+        self._bits = num_slots.bit_length() - 1
+        self._mask = num_slots - 1
+        self._buffer = memoryview(self._mmap)
+        start = HEADER.size
+        self._keys = self._buffer[start:start + 8 * num_slots].cast('Q')
+        start += 8 * num_slots
+        self._values = self._buffer[start:start + 4 * num_slots].cast('I')
+
+    def __len__(self):
+        return self.count
+
+    def get(self, key):
+        """
+        Returns (rotation, x, votes) for a key of surface_key, or None.
+        """
+        keys = self._keys
+        mask = self._mask
+        i = _slot(key, self._bits)
+        while True:
+            slot_key = keys[i]
+            if slot_key == key:
+                value = self._values[i]
+                return (value >> 8) & 0xff, value & 0xff, value >> 16
+            if not slot_key:
+                return None
+            i = (i + 1) & mask
+
+    def lookup(self, heights, pytromino_type):
+        """
+        Returns the (rotation, x) stored for column heights and a pytromino
+        type, or None.
+        """
+        entry = self.get(surface_key(heights, pytromino_type))
+        return entry[:2] if entry else None
+
+    def items(self):
+        """
+        Iterate over (key, (rotation, x, votes)) for every entry.
+        """
+        for i, key in enumerate(self._keys):
+            if key:
+                value = self._values[i]
+                yield key, ((value >> 8) & 0xff, value & 0xff, value >> 16)
+
+    def close(self):
+        self._keys.release()
+        self._values.release()
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _footprint(pytromino_type, rotation):
+    for footprint in FOOTPRINTS[pytromino_type]:
+        if footprint.rotation == rotation:
+            return footprint
+    return None
+
+def placement_fits(heights, num_rows, pytromino_type, rotation, x):
+    """
+    Whether a placement from the database can be hard-dropped on a board of
+    these column heights and stay below the hidden top 2 rows.
+    """
+    footprint = _footprint(pytromino_type, rotation)
+    if footprint is None or x + footprint.min_dx < 0 or x + footprint.max_dx >= len(heights):
+        return False
+    return drop_row(footprint, x, heights) + footprint.max_dy < num_rows - 2
+
+
+# ---------------------------------------------------------------------------- #
+# ------------------------------- Offline Filling ---------------------------- #
+# ---------------------------------------------------------------------------- #
+
+def fill(path, num_games=10, max_pieces=500, bot=None, seed=0):
+    """
+    Play num_games self-play games with a deep search bot and add the
+    placement it chooses for every surface met to the database at path,
+    created if missing. Each choice is a vote: an entry keeps the placement
+    with the most votes, counting the entries already in the file. Moves
+    that hold are not recorded, as they depend on the queue. Returns the
+    number of entries.
+    """
+    from bot import Bot
+    from engine import Game
+    bot = Bot(beam_width=32, time_budget=0.5) if bot is None else bot
+    votes = {}
+    num_cols = None
+    if os.path.exists(path):
+        with SurfaceDB(path) as db:
+            num_cols = db.num_cols
+            for key, (rotation, x, count) in db.items():
+                votes[key] = {(rotation, x): count}
+    for game_seed in range(seed, seed + num_games):
+        game = Game(seed=game_seed)
+        if num_cols is None:
+            num_cols = game.num_cols
+        assert game.num_cols == num_cols, 'the database is for another board width'
+        while not game.gameover and game.pieces < max_pieces:
+            move = bot.choose(game)
+            if move is not None and not move.hold:
+                heights = column_heights(row_masks(game.board), num_cols)
+                choices = votes.setdefault(surface_key(heights, game.pytro_type), {})
+                choice = (move.rotation, move.x)
+                choices[choice] = choices.get(choice, 0) + 1
+            bot.play(game, move=move)
+    entries = {}
+    for key, choices in votes.items():
+        choice, count = max(choices.items(), key=lambda item: item[1])
+        entries[key] = choice + (count,)
+    write_db(path, entries, num_cols)
+    return len(entries)
+
+if __name__ == '__main__':
+    import sys
+    # python surfacedb.py <path> [num_games] [max_pieces] [seed]
+    print(fill(sys.argv[1], *(int(arg) for arg in sys.argv[2:])), 'entries')
@@ -0,0 +1,288 @@
+import os
+import select
+import sys
+from contextlib import nullcontext
+from models import *
+from engine import Game
+from shapes import ORIENTATIONS
+from gravity import Gravity, GravityCurve, TickClock
+from palette import color_scheme, COLOR_RGB
+
+# ---------------------------------------------------------------------------- #
+# ----------------------------- Terminal Renderer ---------------------------- #
+# ---------------------------------------------------------------------------- #
+
+# Draws an engine.Game with ANSI escape codes, for play over SSH and for
+# watching headless bots. The screen is a set of cells keyed by (row, column);
+# every frame only the cells that differ from the previous frame are written,
+# each after a cursor move, so a frame usually costs a few dozen bytes. Each
+# board cell is two characters wide.
+
+ESC = '\x1b['
+
+# keys of view.py -> Game.apply action
+KEY_ACTIONS = {
+    ESC + 'A': 'cw',
+    'z': 'ccw',
+    ESC + 'B': 'down',
+    ESC + 'D': 'left',
+    ESC + 'C': 'right',
+    ' ': 'drop',
+    'c': 'hold',
+    'q': 'quit',
+}
+
+def ansi_256(name):
+    """
+    Returns the xterm 256-color index closest to a turtle color name.
+    >>> ansi_256('black'), ansi_256('red'), ansi_256('lightblue')
+    (16, 196, 153)
+    """
+    r, g, b = (round(c * 5 / 255) for c in COLOR_RGB[name])
+    return 16 + 36 * r + 6 * g + b
+
+
+class TerminalRenderer:
+    """
+    Renders the board, ghost, held and next pytrominos, score and lines of a
+    game, writing only what changed since the last frame.
+
+    >>> out = []
+    >>> renderer = TerminalRenderer(out.append, scheme=0)
+    >>> game = Game(seed=0)
+    >>> full = renderer.render(game)
+    >>> game.apply('left')
+    True
+    >>> 0 < renderer.render(game) < 20 < full
+    True
+    """
+
+    def __init__(self, write=sys.stdout.write, flush=None, scheme=0, top=1, left=1):
+        """
+        Parameters
+        ----------
+        write:
+            type: Function, str -> any
+            brief: (optional) writes the escape codes of a frame, once per frame
+        flush:
+            type: Function, () -> any
+            brief: (optional) called after every frame, defaults to
+            sys.stdout.flush when writing to stdout
+        scheme:
+            type: int
+            brief: (optional) index of the colors in palette.color_scheme
+        top, left:
+            type: int
+            brief: (optional) screen row and column of the upper left corner
+        """
+        self.write = write
+        self.flush = flush if flush is not None or write is not sys.stdout.write else sys.stdout.flush
+        colors = color_scheme[scheme]
+        self.top = top
+        self.left = left
+        # background of each board item: 0 empty, 1 - 7 pytrominos, garbage
+        self.item_sgr = [f'{ESC}48;5;{ansi_256(name)}m' for name in colors[:8]]
+        self.item_sgr.append(f'{ESC}48;5;{ansi_256("light slate gray")}m')
+        self.ghost_sgr = [f'{ESC}38;5;{ansi_256(name)};48;5;{ansi_256(colors[0])}m' for name in colors[:8]]
+        self.text_sgr = f'{ESC}38;5;{ansi_256(colors[9])};48;5;{ansi_256(colors[8])}m'
+        self.screen = {}
+
+    def _piece_cells(self, cells, row, col, pytromino_type):
+        """
+        Draw a pytromino in its spawn rotation in a 4 x 2 box.
+        """
+        for r in range(2):
+            for c in range(4):
+                cells[row + r, col + 2 * c] = ('  ', self.text_sgr)
+        if pytromino_type is None:
+            return
+        blocks = ORIENTATIONS[pytromino_type][0]
+        min_dx = min(dx for dx, _ in blocks)
+        max_dy = max(dy for _, dy in blocks)
+        sgr = self.item_sgr[pytromino_type.value]
+        for dx, dy in blocks:
+            cells[row + max_dy - dy, col + 2 * (dx - min_dx)] = ('  ', sgr)
+
+    def frame(self, game):
+        """
+        Returns {(row, column): (text, escape code)} for every cell of the
+        screen showing game.
+        """
+        cells = {}
+        board = game.board
+        num_cols = game.num_cols
+        num_visible = game.num_rows - 2
+        top = self.top
+        left = self.left
+        text = self.text_sgr
+        border = '+' + '--' * num_cols + '+'
+        cells[top, left] = (border, text)
+        cells[top + num_visible + 1, left] = (border, text)
+        for y in range(num_visible):
+            row = top + num_visible - y
+            cells[row, left] = ('|', text)
+            cells[row, left + 2 * num_cols + 1] = ('|', text)
+            items = board.row_items(y)
+            for x in range(num_cols):
+                cells[row, left + 1 + 2 * x] = ('  ', self.item_sgr[items[x]])
+        if not game.gameover:
+            ghost_y = game.y - game.drop_distance()
+            item = game.pytro_type.value
+            for dx, dy in game.blocks:
+                if ghost_y + dy < num_visible:
+                    cells[top + num_visible - ghost_y - dy, left + 1 + 2 * (game.x + dx)] = \
+                        ('[]', self.ghost_sgr[item])
+            for dx, dy in game.blocks:
+                if game.y + dy < num_visible:
+                    cells[top + num_visible - game.y - dy, left + 1 + 2 * (game.x + dx)] = \
+                        ('  ', self.item_sgr[item])
+        panel = left + 2 * num_cols + 4
+        held = game.holder.get_item()
+        cells[top + 1, panel] = ('HOLD', text)
+        self._piece_cells(cells, top + 2, panel, held.get_type() if held else None)
+        cells[top + 5, panel] = ('NEXT', text)
+        self._piece_cells(cells, top + 6, panel, game.next_type)
+        cells[top + 9, panel] = (f'SCORE {game.score:<9}', text)
+        cells[top + 10, panel] = (f'LINES {game.lines:<9}', text)
+        cells[top + 11, panel] = ('GAME OVER' if game.gameover else ' ' * 9, text)
+        return cells
+
+    def render(self, game):
+        """
+        Write the cells that changed since the last frame. Returns the number
+        of cells written.
+        """
+        cells = self.frame(game)
+        screen = self.screen
+        out = []
+        cursor = None
+        sgr = None
+        changed = 0
+        for key in sorted(cells):
+            cell = cells[key]
+            if screen.get(key) == cell:
+                continue
+            screen[key] = cell
+            changed += 1
+            cell_text, cell_sgr = cell
+            if cursor != key:
+                out.append(f'{ESC}{key[0]};{key[1]}H')
+            if sgr != cell_sgr:
+                out.append(cell_sgr)
+                sgr = cell_sgr
+            out.append(cell_text)
+            cursor = (key[0], key[1] + len(cell_text))
+        if out:
+            out.append(ESC + '0m')
+            self.write(''.join(out))
+            if self.flush:
+                self.flush()
+        return changed
+
+    def open(self):
+        """
+        Clear the screen and hide the cursor; the next frame is drawn whole.
+        """
+        self.screen = {}
+        self.write(f'{ESC}2J{ESC}?25l')
+
+    def close(self):
+        """
+        Show the cursor again below the game.
+        """
+        self.write(f'{ESC}0m{ESC}?25h{ESC}{self.top + 24};1H\n')
+        if self.flush:
+            self.flush()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class KeyReader:
+    """
+    Reads key presses from a terminal without waiting for them (POSIX
+    only). Use it in a with statement, which puts the terminal in cbreak
+    mode and restores it afterwards.
+    """
+
+    def __init__(self, fd=None):
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self._saved = None
+
+    def __enter__(self):
+        import termios
+        import tty
+        self._saved = termios.tcgetattr(self.fd)
+        tty.setcbreak(self.fd)
+        return self
+
+    def __exit__(self, *exc):
+        import termios
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved)
+
+    def actions(self):
+        """
+        Returns the actions of KEY_ACTIONS pressed since the last call.
+        """
+        data = ''
+        while select.select([self.fd], [], [], 0)[0]:
+            chunk = os.read(self.fd, 64)
+            if not chunk:
+                break
+            data += chunk.decode(errors='ignore')
+        actions = []
+        i = 0
+        while i < len(data):
+            key = data[i:i + 3] if data.startswith(ESC, i) else data[i]
+            action = KEY_ACTIONS.get(key)
+            if action:
+                actions.append(action)
+            i += len(key)
+        return actions
+
+
+def play(game=None, bot=None, renderer=None, tick_rate=60, level=1, bot_move_ticks=4):
+    """
+    Run a game in the terminal, the loop of view.play_game: fixed ticks of
+    gravity with a lock delay, and one frame per loop. A bot places one
+    pytromino every bot_move_ticks ticks; without a bot the keys of view.py
+    play. Returns the game.
+    """
+    game = Game() if game is None else game
+    renderer = TerminalRenderer() if renderer is None else renderer
+    gravity = Gravity(GravityCurve(level, tick_rate).speed(0), lock_delay=tick_rate // 2)
+    clock = TickClock(tick_rate)
+    keys = None if bot else KeyReader()
+    timer = 0
+    with renderer, (keys or nullcontext()):
+        while not game.gameover:
+            renderer.render(game)
+            for _ in range(clock.wait()):
+                if bot:
+                    timer += 1
+                    if timer >= bot_move_ticks:
+                        timer = 0
+                        bot.play(game)
+                        gravity.reset()
+                else:
+                    for action in keys.actions():
+                        if action == 'quit':
+                            return game
+                        if game.apply(action) and action == 'hold':
+                            gravity.reset()
+                gravity.step(game)
+                if game.gameover:
+                    break
+        renderer.render(game)
+    return game
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['bot']:
+        from bot import Bot
+        play(bot=Bot())
+    else:
+        play()
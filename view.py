@@ -4,18 +4,15 @@ import time
 import random
 from models import *
 from board import *
-
-color_scheme = [
-    # order = board, background, 7tiles, screen background, text color
-
-    # the classic board, just the way everybody loves the blocks to be like
-    ['black','lightblue', 'yellow', 'orange', 'green', 'purple', 'blue', 'red', 'wheat', 'black'],
-    # a glacial color designed to hurt your eyes
-    ['snow', 'cornflower blue', 'royal blue', 'powder blue', 'sky blue', 'steel blue', 'light blue', 'deep sky blue', 'alice blue', 'navy'],
-    # the peacock color design, blue green, and a tiny bit of light orange
-    ['azure', 'light sea green', 'cadet blue', 'coral','gold','medium aquamarine','cornflower blue', 'turquoise','light slate gray', 'aquamarine'],
-    # some of our favorite food, now in turtle colors
-    ['antique white', 'salmon', 'light salmon', 'dark salmon', 'tomato', 'coral', 'orange red', 'chocolate', 'cornsilk', 'maroon']]
+from stats import Stats
+from events import *
+from gravity import *
+from features import FeatureTracker
+from shapes import ORIENTATIONS
+from kicks import KICKS
+from bot import Bot
+from history import History
+from palette import color_scheme
 
 # each time a new window opens, select a random set of presets colors from color scheme 
 seed = random.randint(0, len(color_scheme) - 1)
@@ -42,20 +39,114 @@ y_spawn = 21
 
 # other global variables 
 score = 0
+stats = Stats()
 held = False
 gameover = False
 
+# telemetry, off unless start_telemetry is called
+event_ring = None
+event_writer = None
+
+def start_telemetry(path, binary=False):
+    """
+    Stream the events of every game to path (JSONL, or binary records).
+    """
+    global event_ring, event_writer
+    event_ring = EventRing()
+    event_writer = EventWriter(event_ring, path, binary).start()
+
+def flush_telemetry(stop=False):
+    """
+    Write the events left in the ring to disk. The writer thread is a
+    daemon, so whatever it has not flushed when the program exits is lost.
+    Unless stop, a new writer keeps streaming to the same file.
+    """
+    global event_ring, event_writer
+    if event_writer is None:
+        return
+    event_writer.stop()
+    if stop:
+        event_ring = event_writer = None
+    else:
+        binary = event_writer.encode is encode_binary
+        event_writer = EventWriter(event_ring, event_writer.path, binary).start()
+
+def emit(kind, value=0, extra=0):
+    if event_ring is not None:
+        event_ring.emit(kind, 0, value, extra)
+
 acceleration = False
 accel_factor = 0.993
 
+# autoplay: the bot places one pytro every bot_move_ticks ticks
+autoplay = False
+bot = Bot(time_budget=0.02)
+bot_move_ticks = 4
+bot_timer = 0
+
+# undo/redo of every lock and hold, keeping at most history_capacity cells
+history_capacity = 100000
+history = History(history_capacity)
+
+# the game advances in fixed ticks; gravity (from delay_cpy) may move the
+# pytro several rows per tick, and a grounded pytro locks after lock_delay
+ticks_per_second = 20
+lock_delay = 0.5 # seconds
+gravity = Gravity(speed_for_delay(delay, ticks_per_second), round(lock_delay * ticks_per_second))
+
 # instantiate a new turtle pen for rendering
 tp = turtle.Turtle()
 tp.penup()
 tp.shape('square')
 tp.speed('fastest')
 
-# instantiate a Board object; default size is 10 * 20
-board = Board(cell_item=0)
+# separate pens for the HUD, so that clearing the board does not erase it
+# and each element is only redrawn when what it shows changes
+def new_hud_turtle():
+    t = turtle.Turtle()
+    t.penup()
+    t.hideturtle()
+    t.shape('square')
+    t.speed('fastest')
+    return t
+
+score_tp = new_hud_turtle()
+holder_tp = new_hud_turtle()
+next_tp = new_hud_turtle()
+hud_turtle_lst = [score_tp, holder_tp, next_tp]
+
+# what the HUD currently shows: (score, lines), held pytro, next pytro
+hud_shown = [None, None, None]
+
+class FrameBudget:
+    """
+    Keeps a moving average of how long a frame takes to render, and turns
+    cosmetic layers (the ghost) off while frames take longer than ratio of
+    the tick interval. They come back once frames are comfortably fast again.
+    """
+
+    def __init__(self, ratio=0.5, smoothing=0.2):
+        self.ratio = ratio
+        self.smoothing = smoothing
+        self.cost = 0.0
+        self.cosmetic = True
+
+    def record(self, cost, interval):
+        self.cost += (cost - self.cost) * self.smoothing
+        budget = interval * self.ratio
+        if self.cosmetic and self.cost > budget:
+            self.cosmetic = False
+        elif not self.cosmetic and self.cost < budget * 0.75:
+            self.cosmetic = True
+
+frame_budget = FrameBudget()
+
+# instantiate a Board object; default size is 10 * 20. Its walls and floor
+# are stored as solid cells, so reading next to the board needs no checks
+board = PaddedBoard(cell_item=0)
+
+# column heights of the board, kept up to date by pytro_in_grid and check_all_rows
+height_map = FeatureTracker(board)
 
 # generate a list of turtles to render each level of difficulty separately
 level_turtle_lst = [turtle.Turtle() for _ in range(4)]
@@ -65,10 +156,10 @@ for t in level_turtle_lst:
 level_str_lst = ['(1) - Easy', '(2) - Medium', '(3) - Hard', '(4) - Expert']
 
 # lists of available keys in each scene
-main_keys = ['s', 't', 'd', 'q']
+main_keys = ['s', 't', 'd', 'q', 'a', 'p']
 return_keys = ['b']
 difficulty_keys = ['1', '2', '3', '4', 'f']
-game_keys = ['Up', 'Down', 'Left', 'Right', 'z', 'c', 'space']
+game_keys = ['Up', 'Down', 'Left', 'Right', 'z', 'c', 'space', 'u', 'r']
 total_t_keys = main_keys + return_keys + difficulty_keys
 
 
@@ -80,20 +171,28 @@ pytro_pos = (x_spawn, y_spawn) # position of the current pytro
 # create a holder for holding a block value
 holder = Holder()
 
-# overwrite get_board_item to avoid IndexError
 def get_board_item_safe(board, x, y):
-    global get_board_item
-    try:
-        return get_board_item(board, x, y)
-    except:
-        return 
+    """
+    Read a cell of a PaddedBoard up to PAD cells off the board: walls and
+    floor are filled, the space above the board is empty. Cells further off
+    are not stored, and read as None (free) as they always have.
+
+    >>> board = PaddedBoard(2, 2, cell_item=0)
+    >>> get_board_item_safe(board, -1, 0), get_board_item_safe(board, 0, 3)
+    (-1, 0)
+    >>> get_board_item_safe(board, 1, -17) is None, get_board_item_safe(board, 0, 2 + board.TOP) is None
+    (True, True)
+    """
+    pad = board.PAD
+    if -pad <= x < board.num_cols + pad and -pad <= y < board.num_rows + board.TOP:
+        return board.get_cell(x, y)
+    return None
 
+# write a cell in place, ignoring cells off the board
 def set_board_item_safe(board, x, y, item):
-    global set_board_item
-    try:
-        return set_board_item(board, x, y, item)
-    except:
-        return 
+    if 0 <= x < board.num_cols and 0 <= y < board.num_rows:
+        board.set_cell(x, y, item)
+    return board
 
 shift_left_hof = lambda steps: lambda pos: shift_left_fn(pos, steps)
 shift_down_hof = lambda steps: lambda pos: shift_down_fn(pos, steps)
@@ -115,7 +214,7 @@ def render_board(board, tp):
         for x in range(board.get_num_cols()):
             for y in range(board.get_num_rows() - 2):
                 pos_x, pos_y = add_pos(init_pos, mul_pos((x, y), 20))
-                pos_item = get_board_item_safe(board, x, y)
+                pos_item = board.get_cell(x, y)
                 # if pos_item:
                 pos_color = colors[pos_item]
                 tp.color(pos_color)
@@ -157,25 +256,34 @@ def render_ghost(pytro, tp, ghost_pos):
     """
     render_pytro(pytro, tp, ghost_pos, lambda i: True, tp.dot)
 
-def render_score(tp, score):
+def render_labels(tp):
     """
-    Render the player's current score, the holder, and the next pytro during a game.
+    Render the static "Holder:" and "Next:" labels.
     """
-    font_size = 20
-    font_set = ("Arial", font_size, "normal")
+    font_set = ("Arial", 20, "normal")
     tp.color(colors[9])
-    tp.hideturtle()
-    tp.goto(50, 300)
-    tp.write("Score: {}".format(score), move=False, align="left", font=font_set)
     tp.goto(-160, 200)
     tp.write("Holder:", move=False, align="left", font=font_set)
     tp.goto(20, 200)
     tp.write("Next:", move=False, align="left", font=font_set)
 
+def render_score(tp, score, lines=0):
+    """
+    Render the player's current score and number of lines cleared.
+    """
+    font_set = ("Arial", 20, "normal")
+    tp.clear()
+    tp.color(colors[9])
+    tp.goto(50, 300)
+    tp.write("Score: {}".format(score), move=False, align="left", font=font_set)
+    tp.goto(-160, 300)
+    tp.write("Lines: {}".format(lines), move=False, align="left", font=font_set)
+
 def render_holder(tp, holder):
     """
     Render the pytro in the holder. 
     """
+    tp.clear()
     pytro_held = holder.get_item()
     new_pytro = pytromino_factory(Pytromino.Types(pytro_held.get_index()))
     render_pytro_out(new_pytro, tp, (0, 23))
@@ -184,8 +292,33 @@ def render_next(tp, pytro_next):
     """
     Render the next pytro. 
     """
+    tp.clear()
     render_pytro_out(pytro_next, tp, (8, 23))
 
+def reset_hud():
+    """
+    Clear the HUD pens and draw the labels for a new game.
+    """
+    for t in hud_turtle_lst:
+        t.clear()
+    hud_shown[:] = [None, None, None]
+    render_labels(score_tp)
+
+def render_hud():
+    """
+    Redraw the score, holder and next pytro, but only the ones that changed
+    since they were last drawn.
+    """
+    if hud_shown[0] != (score, stats.lines):
+        render_score(score_tp, score, stats.lines)
+        hud_shown[0] = (score, stats.lines)
+    if holder.get_item() is not hud_shown[1]:
+        render_holder(holder_tp, holder)
+        hud_shown[1] = holder.get_item()
+    if pytro_next is not hud_shown[2]:
+        render_next(next_tp, pytro_next)
+        hud_shown[2] = pytro_next
+
 def check_all_rows(board):
     """
     Checks for and removes any full row from board.
@@ -194,13 +327,15 @@ def check_all_rows(board):
         full_rows_idx = [i for i in range(board.get_num_rows()) if check_row_full(board, i)]
         counter = 0
         global score
-        full_rows_total = len(full_rows_idx)
-        if 0 < full_rows_total < 4:
-            score += (full_rows_total * 2 - 1) * 100
-        elif full_rows_total >= 4:
-            score += 800
+        points = line_clear_score(len(full_rows_idx))
+        score += points
+        stats.on_clear(len(full_rows_idx), points)
+        if full_rows_idx:
+            emit(EventType.CLEAR, len(full_rows_idx), points)
         for i in full_rows_idx:
+            history.pop_row(i - counter, board.row_items(i - counter))
             pop_row(board, i - counter)
+            height_map.pop_row(i - counter)
             counter += 1
     except Exception as err:
         pass
@@ -251,7 +386,10 @@ def pytro_in_grid(pytro):
     for i in pytro.blocks_pos:
         pos_x = pytro_pos[0] + i[0]
         pos_y = pytro_pos[1] + i[1]
-        board = set_board_item_safe(board, pos_x, pos_y, item)
+        if 0 <= pos_x < board.num_cols and 0 <= pos_y < board.num_rows:
+            history.set_cell(pos_x, pos_y, board.get_cell(pos_x, pos_y), item)
+            board.set_cell(pos_x, pos_y, item)
+            height_map.set_cell(pos_x, pos_y, item)
 
 def rotation_cw():
     return lambda x: rotate_block_90_cw(pytro, x)
@@ -268,8 +406,11 @@ def validator_left(coordinate):
 def validator_right(coordinate):
     return validator(coordinate, can_right)
 
+def can_drop_one(pytro, board):
+    return can_drop(pytro, board, 1)
+
 def validator_down(coordinate):
-    return validator(coordinate, can_drop)
+    return validator(coordinate, can_drop_one)
 
 def validator_rotate_cw(coordinate):
     return validator(coordinate, can_rotate_cw)
@@ -280,6 +421,7 @@ def validator_rotate_acw(coordinate):
 def hold():
     global held, pytro, holder, pytro_pos
     if not held:
+        history.begin(game_state())
         if not holder.get_item():
             holder.store(pytro)
             spawn_new_pytro()
@@ -290,18 +432,53 @@ def hold():
             pytro = dummy
             pytro_pos = (x_spawn, y_spawn)
         held = True  
+        gravity.reset()
+        stats.on_hold()
+        emit(EventType.HOLD, holder.get_item().get_index())
+        history.commit(game_state())
 
 def endpyt():
     global pytro, board, pytro_pos, held, ghost_pos, delay_cpy
+    gravity.reset()
+    history.begin(game_state())
     pytro_in_grid(pytro)
+    stats.on_lock()
+    emit(EventType.LOCK, pytro.get_index(), stats.pieces)
     check_all_rows(board)
     spawn_new_pytro()
     pytro_pos = (x_spawn, y_spawn)
     held = False
+    history.commit(game_state())
     ghost_pos = find_ghost_pos(board, pytro)
     if acceleration:
         delay_cpy *= accel_factor
 
+def game_state():
+    """
+    The state that history restores besides the board. Pytros are never
+    changed in place, so they are kept by reference; stats is, so it is
+    copied.
+    """
+    return pytro, pytro_pos, pytro_next, holder.get_item(), held, score, stats.copy()
+
+def set_game_state(state):
+    global pytro, pytro_pos, pytro_next, held, score, stats
+    pytro, pytro_pos, pytro_next, held_item, held, score, saved_stats = state
+    # the saved copy may be restored again by a later undo or redo
+    stats = saved_stats.copy()
+    holder.store(held_item)
+    gravity.reset()
+
+def undo():
+    state = history.undo(board, height_map)
+    if state:
+        set_game_state(state)
+
+def redo():
+    state = history.redo(board, height_map)
+    if state:
+        set_game_state(state)
+
 def spawn_new_pytro():
     global pytro, pytro_next
     pytro = pytro_next
@@ -310,25 +487,102 @@ def spawn_new_pytro():
 def rocket():
     global pytro_pos, ghost_pos
     ghost_pos = find_ghost_pos(board, pytro)
+    stats.on_hard_drop(pytro_pos[1] - ghost_pos[1])
+    emit(EventType.HARD_DROP, pytro_pos[1] - ghost_pos[1])
     pytro_pos = ghost_pos
     endpyt()
 
+def can_fall():
+    """
+    Check whether the pytro can move down one row, floor included.
+    """
+    above_floor = all(pytro_pos[1] + i[1] > 0 for i in pytro.blocks_pos)
+    return above_floor and can_drop(pytro, board, 1)
+
+def gravity_tick():
+    """
+    Advance gravity by one tick: fall the rows due, and lock the pytro once
+    it has been on the ground for the lock delay.
+    """
+    global pytro_pos
+    gravity.set_speed(speed_for_delay(delay_cpy, ticks_per_second))
+    rows = gravity.rows_due()
+    while rows and can_fall():
+        pytro_pos = (pytro_pos[0], pytro_pos[1] - 1)
+        rows -= 1
+    if gravity.lock_due(not can_fall()):
+        endpyt()
+
+def bot_move():
+    """
+    Let the bot place the current pytro: hold if it chooses to, then put
+    the pytro in the chosen rotation and column at the spawn row and drop it.
+    """
+    global pytro, pytro_pos
+    pytro_held = holder.get_item()
+    move = bot.search(height_map.masks, board.num_cols, board.num_rows,
+                      [pytro.get_type(), pytro_next.get_type()],
+                      pytro_held.get_type() if pytro_held else None, not held)
+    if move:
+        if move.hold:
+            hold()
+        blocks = ORIENTATIONS[pytro.get_type()][move.rotation]
+        if not any(board.get_cell(move.x + dx, y_spawn + dy) for dx, dy in blocks):
+            pytro = copy_pytromino(pytro, blocks)
+            pytro_pos = (move.x, y_spawn)
+    rocket()
+
+def bot_tick():
+    global bot_timer
+    bot_timer += 1
+    if bot_timer >= bot_move_ticks:
+        bot_timer = 0
+        bot_move()
+
+def stack_below(heights, pytro, pytro_pos):
+    """
+    Whether pytro cannot drop one row, from the column heights of a board
+    whose filled cells all lie below it, as when it has just come in from the
+    top: then it cannot drop iff a column reaches up to one of its blocks.
+    Columns off the board are walls, as in PaddedBoard.
+
+    >>> spawned = pytromino_factory(Pytromino.Types.T)
+    >>> board = PaddedBoard(cell_item=0)
+    >>> for y in range(19):
+    ...     board.set_cell(4, y, 1)
+    >>> stack_below(FeatureTracker(board).heights, spawned, pytro_pos), not can_drop(spawned, board, 1)
+    (False, False)
+    >>> board.set_cell(4, 19, 1) # the stack reaches the spawned pytro
+    >>> stack_below(FeatureTracker(board).heights, spawned, pytro_pos), not can_drop(spawned, board, 1)
+    (True, True)
+    >>> stack_below([0] * 10, spawned, (0, 21)) # against the left wall
+    True
+    """
+    x, y = pytro_pos
+    num_cols = len(heights)
+    for i in pytro.blocks_pos:
+        col = x + i[0]
+        if not 0 <= col < num_cols or heights[col] >= y + i[1]:
+            return True
+    return False
+
 def check_over(board, pytro, pytro_pos):
     global gameover
-    try: 
-        for i in pytro.blocks_pos:
-            if pytro_pos[1] + i[1] >= board.get_num_rows() - 2:
-                gameover = not can_drop(pytro, board, 1)
-    except Exception as err:
-        pass
+    if max(pytro_pos[1] + i[1] for i in pytro.blocks_pos) >= board.get_num_rows() - 2:
+        gameover = stack_below(height_map.heights, pytro, pytro_pos)
+    if gameover:
+        emit(EventType.GAME_OVER, score, stats.pieces)
 
 def play_game():
     try:    
         deactivate_all_keys()
-        global board, gameover, delay_cpy, holder, score
-        board = Board(cell_item=0)
+        global board, gameover, delay_cpy, holder, score, stats, height_map, history
+        board = PaddedBoard(cell_item=0)
+        height_map = FeatureTracker(board)
+        history = History(history_capacity)
         holder = Holder()
         score = 0
+        stats = Stats()
         gameover = False
         ws.listen()
         ws.onkeypress(lambda: validated_apply_safe("Left"), "Left")
@@ -339,36 +593,34 @@ def play_game():
         ws.onkeypress(lambda: hold(), "c")
         ws.onkeypress(lambda: rocket(), "space")
         ws.onkeypress(lambda: quit_game(), "q")
+        ws.onkeypress(undo, "u")
+        ws.onkeypress(redo, "r")
         delay_cpy = delay
+        reset_hud()
+        gravity.reset()
+        clock = TickClock(ticks_per_second)
+        ticks_due = 1
     
         while not gameover:
+            frame_start = time.perf_counter()
             ws.update()
 
-            # check for the bottom
-            global pytro_pos
-            for i in pytro.blocks_pos:
-                pos_y = pytro_pos[1] + i[1]
-                # if hit bottom
-                if pos_y == 0:
-                    endpyt()
-
-            # check if the pytro can drop by one grid
-            if can_drop(pytro, board, 1):
-                pytro_pos = (pytro_pos[0], pytro_pos[1] - 1)
-                render_pytro_in(pytro, tp, pytro_pos)
-            else:
-                endpyt()
+            for _ in range(ticks_due):
+                if autoplay:
+                    bot_tick()
+                gravity_tick()
 
             render_board(board, tp)
-            if holder.get_item():
-                render_holder(tp, holder)
-            render_next(tp, pytro_next)
+            render_hud()
             render_pytro_in(pytro, tp, pytro_pos)
-            ghost_pos = find_ghost_pos(board, pytro)
-            render_ghost(pytro, tp, ghost_pos)
-            render_score(tp, score)
+            # the ghost is cosmetic, drop it when rendering falls behind
+            if frame_budget.cosmetic:
+                ghost_pos = find_ghost_pos(board, pytro)
+                render_ghost(pytro, tp, ghost_pos)
 
-            time.sleep(delay_cpy)
+            # sleep only for what is left of the tick
+            frame_budget.record(time.perf_counter() - frame_start, clock.interval)
+            ticks_due = clock.wait()
 
             check_over(board, pytro, pytro_pos)
         ws.update()
@@ -376,9 +628,17 @@ def play_game():
     except Exception as er:
         pass
 
+def play_bot():
+    global autoplay
+    autoplay = True
+    play_game()
+
 def game_over():
     deactivate_all_keys()
+    flush_telemetry()
     tp.clear()
+    for t in hud_turtle_lst:
+        t.clear()
     tp.goto((0, 0))
     tp.write('GAME OVER!', move=False, align="center", font=("Arial", 32, "normal"))
     tp.goto((0, -50))
@@ -430,7 +690,7 @@ def set_level(level, select=False):
     t.goto(-50, 50 * (1 - level))
     sty = 'bold' if select else 'normal'
     if select:
-        delay = 0.4 - level * 0.1
+        delay = LEVEL_DELAYS[level]
     t.write(level_str_lst[level], move=False, align='left', font=("Cambria", 15, sty))
 
 spawn_new_pytro()
@@ -490,6 +750,7 @@ def return_main_from_d():
 
 def quit_game():
     try: 
+        flush_telemetry(stop=True)
         ws.bye()
     except Exception as err:
         pass
@@ -506,23 +767,65 @@ def deactivate_all_keys():
     deactivate_keys(total_t_keys, 'turtle')
     deactivate_keys(game_keys, 'screen')
 
+def validator_on_board(coordinate):
+    return valid_coordinate(board, add_pos(pytro_pos, coordinate))
+
+# key -> (transformation, is_rotation, whole-piece checker), built once rather
+# than on every key press.
+key_actions = {
+    "Left": (shift_left_hof(1), False, can_left),
+    "Right": (shift_left_hof(-1), False, can_right),
+    "Down": (shift_down_hof(1), True, can_drop_one),
+}
+
+# key -> clockwise turns, rotated with wall kicks by rotate_pytro
+rotation_keys = {"Up": 1, "z": 3}
+
+def rotate_pytro(turns):
+    """
+    Rotate pytro turns times (1 or 3) around its center_rot with
+    rotate_block_90_cw, then shift it by the first wall kick of kicks.KICKS
+    that puts every block on a free cell of the board. center_rot moves with
+    the kick, as it does with any shift.
+    """
+    global pytro
+    rotated = [(rotation_cw() if turns == 1 else rotation_acw())(pos) for pos in pytro.blocks_pos]
+    # center_rot is where the pytro_dict reference block is, so the blocks
+    # around it give the rotation index of shapes.ORIENTATIONS
+    center = pytro.center_rot
+    blocks = {(pos[0] - center[0], pos[1] - center[1]) for pos in pytro.blocks_pos}
+    kicks = ((0, 0),)
+    for rotation, orientation in enumerate(ORIENTATIONS[pytro.get_type()]):
+        if set(orientation) == blocks:
+            kicks = KICKS[pytro.get_type()][rotation][turns]
+            break
+    for kick in kicks:
+        kicked = [add_pos(pos, kick) for pos in rotated]
+        if all(0 <= x < board.num_cols and 0 <= y < board.num_rows and not board.get_cell(x, y)
+               for x, y in (add_pos(pytro_pos, pos) for pos in kicked)):
+            pytro = copy_pytromino(pytro, kicked)
+            pytro.center_rot = add_pos(center, kick)
+            return
+
 def validated_apply_safe(key_pressed):
     global pytro
-    if key_pressed == "Left":
-        pytro = validated_apply(pytro, shift_left_hof(1), False, validator_left)
-    elif key_pressed == "Right":
-        pytro = validated_apply(pytro, shift_left_hof(-1), False, validator_right)
-    elif key_pressed == "Up":
-        pytro = validated_apply(pytro, rotation_cw(), True, validator_rotate_cw)
-    elif key_pressed == "z":
-        pytro = validated_apply(pytro, rotation_acw(), True, validator_rotate_acw)
-    elif key_pressed == "Down":
-        pytro = validated_apply(pytro, shift_down_hof(1), True, validator_down)
+    turns = rotation_keys.get(key_pressed)
+    if turns:
+        rotate_pytro(turns)
+        return
+    action = key_actions.get(key_pressed)
+    if action:
+        fn, is_rotation, checker = action
+        # the checker looks at the whole pytro, so it only has to run once
+        # instead of once per block as in validator_left and friends
+        if checker(pytro, board):
+            pytro = validated_apply(pytro, fn, is_rotation, validator_on_board)
 
 
 # initial interface 
 def display_main_menu(): 
-    global acceleration
+    global acceleration, autoplay
+    autoplay = False
     font_size = 18
     acc = 'ON' if acceleration else 'OFF'
     diff_level_str = level_str_lst[4 - round(delay * 10)][6:]
@@ -540,6 +843,8 @@ def display_main_menu():
     tp.goto((0, -100))
     tp.write('Press (a) to set acceleration', move=False, align='center', font=("Cambria", font_size, "normal"))
     tp.goto((0, -150))
+    tp.write('Press (p) to watch the bot play.', move=False, align='center', font=("Cambria", font_size, "normal"))
+    tp.goto((0, -200))
     tp.write('Press (q) to quit.', move=False, align='center', font=("Cambria", font_size, "normal"))
     tp.goto((upper_left_pos,320))
     tp.write(f'acceleration: {acc}', move=False, align='left', font=("Cambria", 13, "normal"))
@@ -552,5 +857,6 @@ def display_main_menu():
     turtle.onkey(select_difficulty, 'd')
     turtle.onkey(quit_game, 'q')
     turtle.onkey(accelerate, 'a')
+    turtle.onkey(play_bot, 'p')
     turtle.listen()
     ws.mainloop()